@@ -1,29 +1,21 @@
+import os
+import sys
 import cv2
 import torch
 from ultralytics import YOLO
 import numpy as np
 
-def preprocess_frame(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    filtered = cv2.bilateralFilter(frame, 5, 50, 50) 
-    lab = cv2.cvtColor(filtered, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(6, 6))  
-    l = clahe.apply(l)
-    lab = cv2.merge((l, a, b))
-    enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+# Shared frame-processing helpers live next to the Enhanced scripts. The path is
+# resolved from this file, so the script runs from any working directory as long
+# as "Enhanced Code" stays its sibling directory
+ENHANCED_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Enhanced Code"))
+sys.path.append(ENHANCED_DIR)
+from preprocessing import FramePreprocessor
+from letterbox import Letterbox
+from preview import PreviewServer
 
-    sharpen_kernel = np.array([[0, -0.5, 0],
-                               [-0.5, 3, -0.5],
-                               [0, -0.5, 0]]) 
-
-    sharpened = cv2.filter2D(enhanced, -1, sharpen_kernel)
-    gamma = 1.1  
-    inv_gamma = 1.0 / gamma
-    table = np.array([(i / 255.0) ** inv_gamma * 255 for i in np.arange(0, 256)]).astype("uint8")
-    corrected = cv2.LUT(sharpened, table)
-
-    return corrected
+letterbox = Letterbox((800, 800))  # Keeps aspect ratio; scale/padding cached for the camera geometry
+preprocessor = FramePreprocessor(letterbox=letterbox)  # CLAHE/kernel/LUT built once, filters run at inference size
 
 model_path = "C:/yolov5/runs/train/YOLO8_1M/weights/best.pt" 
 model = YOLO(model_path)
@@ -34,46 +26,40 @@ if not cap.isOpened():
     print("Error: Camera not detected.")
     exit()
 
+# Headless mode (field device): no cv2 window; boxes are only drawn while a
+# browser is connected to the MJPEG preview at http://<device>:PREVIEW_PORT/
+HEADLESS = False
+PREVIEW_PORT = 8080
+preview = PreviewServer(PREVIEW_PORT, fps=5) if HEADLESS else None
+
 while True:
     ret, frame = cap.read()
     if not ret:
         print("Error: Could not read frame.")
         break
-    
-    frame_enhanced = preprocess_frame(frame)
-
-  
-    frame_resized = cv2.resize(frame_enhanced, (800, 800))
+    frame_resized = preprocessor(frame)
     results = model(frame_resized)
 
-  
-    height, width, _ = frame.shape  
-    scale_x = width / 800  
-    scale_y = height / 800  
+    # Letterbox back-projection of every box at once, then keep confident ones
+    det = letterbox.to_source(results[0].boxes.data[:, :6].cpu().numpy())
+    det = det[det[:, 4] >= 0.80]
 
-    for result in results:
-        for box in result.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])  
-            confidence = float(box.conf[0])  
-            
-            if confidence >= 0.80: 
-                class_id = int(box.cls[0])  
-                label = f"{model.names[class_id]} {confidence:.2f}"  
+    draw = not HEADLESS or preview.active
+    for (x1, y1, x2, y2), confidence, class_id in zip(det[:, :4].astype(int).tolist(),
+                                                      det[:, 4].tolist(), det[:, 5].astype(int).tolist()):
+        if draw:
+            label = f"{model.names[class_id]} {confidence:.2f}"  
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
 
-                
-                x1 = int(x1 * scale_x)
-                y1 = int(y1 * scale_y)
-                x2 = int(x2 * scale_x)
-                y2 = int(y2 * scale_y)
-
-               
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-    cv2.imshow("YOLOv8 Detection", frame)
-    
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+    if not HEADLESS:
+        cv2.imshow("YOLOv8 Detection", frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+    elif draw:
+        preview.submit(frame)  # encoded on the preview thread, dropped if it is busy
 
 cap.release()
+if preview is not None:
+    preview.close()
 cv2.destroyAllWindows()
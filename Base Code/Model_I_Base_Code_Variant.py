@@ -1,33 +1,24 @@
+import os
+import sys
 import cv2
 import torch
 import numpy as np
 from models.common import DetectMultiBackend
-from utils.general import non_max_suppression, scale_boxes
+from utils.general import non_max_suppression
 from utils.torch_utils import select_device
 from utils.plots import Annotator
 
-def preprocess_frame(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    filtered = cv2.bilateralFilter(frame, 5, 50, 50) 
-    lab = cv2.cvtColor(filtered, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(6, 6))  
-    l = clahe.apply(l)
-    lab = cv2.merge((l, a, b))
-    enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+# Shared frame-processing helpers live next to the Enhanced scripts. The path is
+# resolved from this file, so the script runs from any working directory as long
+# as "Enhanced Code" stays its sibling directory
+ENHANCED_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Enhanced Code"))
+sys.path.append(ENHANCED_DIR)
+from preprocessing import FramePreprocessor
+from letterbox import Letterbox
+from preview import PreviewServer
 
-  
-    sharpen_kernel = np.array([[0, -0.5, 0],
-                               [-0.5, 3, -0.5],
-                               [0, -0.5, 0]]) 
-
-    sharpened = cv2.filter2D(enhanced, -1, sharpen_kernel)
-    gamma = 1.1  
-    inv_gamma = 1.0 / gamma
-    table = np.array([(i / 255.0) ** inv_gamma * 255 for i in np.arange(0, 256)]).astype("uint8")
-    corrected = cv2.LUT(sharpened, table)
-
-    return corrected
+letterbox = Letterbox((800, 800))  # Keeps aspect ratio; scale/padding cached for the camera geometry
+preprocessor = FramePreprocessor(letterbox=letterbox)  # CLAHE/kernel/LUT built once, filters run at inference size
 device = select_device('cuda:0' if torch.cuda.is_available() else 'cpu')
 weights_path = "C:/yolov5/runs/train/YOLO5_1M/weights/best.pt"
 model = DetectMultiBackend(weights_path, device=device)
@@ -36,33 +27,43 @@ if not cap.isOpened():
     print("Error: Camera not detected.")
     exit()
 
+# Headless mode (field device): no cv2 window; boxes are only drawn while a
+# browser is connected to the MJPEG preview at http://<device>:PREVIEW_PORT/
+HEADLESS = False
+PREVIEW_PORT = 8080
+preview = PreviewServer(PREVIEW_PORT, fps=5) if HEADLESS else None
+
 while True:
     ret, frame = cap.read()
     if not ret:
         print("Error: Could not read frame.")
         break
-    frame_enhanced = preprocess_frame(frame)
-    frame_resized = cv2.resize(frame_enhanced, (800, 800))
+    frame_resized = preprocessor(frame)
     img = torch.from_numpy(frame_resized).to(device)
     img = img.permute(2, 0, 1).float() / 255.0  
     img = img.unsqueeze(0)  
     pred = model(img)
     pred = non_max_suppression(pred, iou_thres=0.5)
     
-    annotator = Annotator(frame_resized, line_width=2)
+    draw = not HEADLESS or preview.active
+    annotator = Annotator(frame, line_width=2)
     for det in pred:
         if det is not None and len(det):
-            det[:, :4] = scale_boxes(img.shape[2:], det[:, :4], frame_resized.shape).round() 
+            det = letterbox.to_source(det.cpu().numpy()).round()  # all boxes back to the camera frame at once
             for *xyxy, conf, cls in reversed(det):
-                if conf >= 0.80:  
-                    detected = True
+                if conf >= 0.80 and draw:  
                     label = f"{model.names[int(cls)]} {conf:.2f}"  
                     annotator.box_label(xyxy, label)
 
                     
-    cv2.imshow("YOLOv5 Detection", annotator.result())
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+    if not HEADLESS:
+        cv2.imshow("YOLOv5 Detection", annotator.result())
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+    elif draw:
+        preview.submit(annotator.result())  # encoded on the preview thread, dropped if it is busy
 cap.release()
+if preview is not None:
+    preview.close()
 cv2.destroyAllWindows()
 
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
-import os, sys, time, json, signal, threading, subprocess
+import os, sys, time, json, random, signal, asyncio, threading, subprocess
 from collections import deque
+from contextlib import asynccontextmanager
+from itertools import islice
 from typing import Optional, Tuple
-from fastapi import FastAPI
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+import ds_payload
+from event_store import EventStore, parse_ts
 from urllib.parse import urlparse
 
 # -------------------------------------------------
@@ -15,11 +19,21 @@ ROOT = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(ROOT, "static")
 INDEX_HTML = os.path.join(ROOT, "index2.html")
 os.makedirs(STATIC_DIR, exist_ok=True)
+EVENT_DB = os.environ.get("EVENT_DB", os.path.join(ROOT, "events.db"))
+EVENT_RETENTION_DAYS = float(os.environ.get("EVENT_RETENTION_DAYS", "30"))
 
 # -------------------------------------------------
 # App
 # -------------------------------------------------
-app = FastAPI()
+@asynccontextmanager
+async def _lifespan(app):
+    _store.start()
+    await _mqtt.start()
+    yield
+    await _mqtt.stop()
+    _store.close()  # flushes what is still queued
+
+app = FastAPI(lifespan=_lifespan)
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 # -------------------------------------------------
@@ -27,19 +41,147 @@ app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 # -------------------------------------------------
 LOG_MAX = 2000
 EVT_MAX = 200
-_logs = deque(maxlen=LOG_MAX)
-_events = deque(maxlen=EVT_MAX)
 SQUELCH_UNTIL = 0.0
 
+class _SeqBuffer:
+    """Ring buffer whose entries carry a monotonically increasing sequence number.
+
+    Entry k of the deque has seq ``self.seq - len + 1 + k``, so since(N)
+    walks back only over the entries newer than N. ``gap`` tells a client
+    that entries it has not seen were already evicted (or cleared) and it
+    should replace its view instead of appending.
+    """
+    def __init__(self, maxlen: int):
+        self._items = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.seq = 0            # seq of the newest entry; never reset, not even by clear()
+
+    def append(self, item) -> int:
+        with self._lock:
+            self.seq += 1
+            if isinstance(item, dict):
+                item["seq"] = self.seq
+            self._items.append(item)
+            return self.seq
+
+    def since(self, seq: int, limit: Optional[int] = None):
+        """(entries newer than ``seq``, newest seq, gap); at most ``limit`` of the newest."""
+        with self._lock:
+            new = self.seq - max(0, seq)
+            if new <= 0:
+                return [], self.seq, new < 0  # a cursor from the future: server restarted
+            gap = new > len(self._items)
+            n = min(new, len(self._items))
+            if limit is not None and n > limit:
+                n, gap = max(0, limit), True
+            out = list(islice(reversed(self._items), n))
+            out.reverse()
+            return out, self.seq, gap
+
+    def tail(self, limit: Optional[int] = None):
+        items, seq, _ = self.since(0, limit)
+        return items, seq
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+_logs = _SeqBuffer(LOG_MAX)
+_events = _SeqBuffer(EVT_MAX)
+_store = EventStore(EVENT_DB, retention_days=EVENT_RETENTION_DAYS)  # survives restarts and /clear
+
+# -------------------------------------------------
+# Push channel (Server-Sent Events on /stream)
+# -------------------------------------------------
+CLIENT_QUEUE_MAX = 500   # per-client backlog before new items are dropped
+KEEPALIVE_S = 15.0
+
+class _Client:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_MAX)
+        self.sent = 0
+        self.dropped = 0        # total items this client lost to a full queue
+        self.unreported = 0     # drops not yet announced to the client
+        self.since = time.time()
+
+class _Hub:
+    """Fans new log lines and events out to the connected /stream clients.
+
+    Producers (request handlers, DeepStream reader threads, MQTT) call
+    publish() from any thread; delivery is scheduled on the event loop and
+    costs nothing while nobody is connected. Each client has a bounded
+    queue: a client that cannot keep up loses the newest items instead of
+    growing memory or slowing the others, and is told how many it missed.
+    """
+    def __init__(self):
+        self._clients = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.cursor = {"log": 0, "event": 0}  # newest seq delivered, per kind (SSE id "log:event")
+        self.dropped = 0
+
+    def subscribe(self) -> _Client:
+        self._loop = asyncio.get_running_loop()
+        c = _Client()
+        self._clients.add(c)
+        return c
+
+    def unsubscribe(self, c: _Client):
+        self._clients.discard(c)
+
+    def publish(self, kind: str, data, seq: int = 0):
+        loop = self._loop
+        if loop is None or not self._clients:
+            return
+        try:
+            loop.call_soon_threadsafe(self._deliver, kind, data, seq)
+        except RuntimeError:
+            pass  # loop closed during shutdown
+
+    def advance(self, log_seq: int, event_seq: int):
+        """Move the id cursor past what a newly connected client was just sent."""
+        self.cursor["log"] = max(self.cursor["log"], log_seq)
+        self.cursor["event"] = max(self.cursor["event"], event_seq)
+
+    def _deliver(self, kind: str, data, seq: int):
+        if seq:
+            self.cursor[kind] = max(self.cursor[kind], seq)
+        eid = f"{self.cursor['log']}:{self.cursor['event']}"
+        for c in self._clients:
+            try:
+                c.queue.put_nowait((kind, data, eid))
+            except asyncio.QueueFull:
+                c.dropped += 1
+                c.unreported += 1
+                self.dropped += 1
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            "clients": [{"queued": c.queue.qsize(), "sent": c.sent, "dropped": c.dropped,
+                         "connected_s": round(now - c.since, 1)} for c in self._clients],
+            "dropped": self.dropped,
+        }
+
+_hub = _Hub()
+
+def _append_log(msg: str):
+    seq = _logs.append(msg)
+    _hub.publish("log", {"seq": seq, "line": msg}, seq)
+
 def log(line: str):
     ts = time.strftime("%H:%M:%S")
     msg = f"[{ts}] {line}"
-    _logs.append(msg)
+    _append_log(msg)
     print(msg, flush=True)
 
 def add_event(it: dict):
+    _store.add(it)  # the history keeps everything; /stop and /clear only squelch the live view
     if time.time() >= SQUELCH_UNTIL:
-        _events.append(it)
+        seq = _events.append(it)
+        _hub.publish("event", it, seq)
 
 # -------------------------------------------------
 # DeepStream command
@@ -59,7 +201,7 @@ def _reader(stream, prefix):
             txt = raw.decode("utf-8", errors="ignore").rstrip()
         except Exception:
             txt = str(raw)
-        _logs.append(f"[{prefix}] {txt}")
+        _append_log(f"[{prefix}] {txt}")
     try:
         stream.close()
     except Exception:
@@ -183,84 +325,229 @@ def _stop_process() -> bool:
 MQTT_HOST = os.environ.get("MQTT_HOST", "127.0.0.1")
 MQTT_PORT = int(os.environ.get("MQTT_PORT", "1883"))
 MQTT_TOPIC = os.environ.get("MQTT_TOPIC", "ds/events")
+MQTT_QUEUE_MAX = int(os.environ.get("MQTT_QUEUE_MAX", "2000"))  # received, not yet decoded
+MQTT_BATCH = int(os.environ.get("MQTT_BATCH", "200"))          # messages decoded per event-loop turn
+MQTT_BACKOFF_MAX = 30.0
+MQTT_RECORD = os.environ.get("MQTT_RECORD", "")  # append raw payloads here (input for benchmark_payload.py)
 
 def _trigger_devices():
     # hook for GPIO/relays if needed later
     pass
 
-def _mqtt_loop():
-    try:
+def _apply_detections(dets) -> int:
+    """Turn the ds_payload records of one message into events; returns how many."""
+    for d in dets:
+        bbox = (d.x1, d.y1, d.x2, d.y2)
+        add_event({
+            "ts": d.ts,
+            "label": d.label,
+            "confidence": d.conf,
+            "bbox": bbox,
+            "track": d.track if d.track >= 0 else None,
+            "sensor": d.sensor,
+            "source": "mqtt",
+        })
+        log(f"[MQTT] {d.label} conf={d.conf} bbox={bbox}")
+    if not dets:
+        log("[MQTT] json (no object)")
+    return len(dets)
+
+class _MqttConsumer:
+    """paho-mqtt driven by the asyncio loop, started and stopped with the app lifespan.
+
+    No network thread: paho's socket callbacks register the broker socket
+    with the event loop (paho's asyncio pattern), and on_message only stamps
+    the payload and puts it on a bounded queue. A separate task drains the
+    queue in batches of up to MQTT_BATCH, decodes and applies them, then
+    yields, so a DeepStream burst can neither stall keepalives on the broker
+    connection nor hold the HTTP handlers for long. When the queue is full
+    new messages are dropped and counted. Lost connections are retried with
+    exponential backoff.
+    """
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.client = None
+        self.queue: Optional[asyncio.Queue] = None
+        self._disconnected: Optional[asyncio.Event] = None
+        self._misc: Optional[asyncio.Task] = None
+        self._tasks = []
+        self._record = None
+        self.connected = False
+
+        # Counters
+        self.received = 0
+        self.dropped = 0          # queue full
+        self.unparsed = 0
+        self.errors = 0           # batches that raised (decoder, recording file, devices)
+        self.detections = 0
+        self.batches = 0
+        self.reconnects = 0
+        self.lag_last = 0.0       # enqueue -> applied, oldest message of the last batch
+        self.lag_max = 0.0
+
+    # ---- paho <-> asyncio glue (connect() runs in an executor, so marshal to the loop) ----
+    def _on_socket_open(self, client, userdata, sock):
+        def _open():
+            self.loop.add_reader(sock, client.loop_read)
+            self._misc = self.loop.create_task(self._misc_loop())
+        self.loop.call_soon_threadsafe(_open)
+
+    def _on_socket_close(self, client, userdata, sock):
+        def _close():
+            self.loop.remove_reader(sock)
+            if self._misc is not None:
+                self._misc.cancel()
+        self.loop.call_soon_threadsafe(_close)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.add_writer, sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self.loop.call_soon_threadsafe(self.loop.remove_writer, sock)
+
+    async def _misc_loop(self):
         import paho.mqtt.client as mqtt
-    except Exception as e:
-        log(f"[MQTT] paho not available: {e}")
-        return
-
-    has_v2 = hasattr(mqtt, "CallbackAPIVersion")
-    if has_v2:
-        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
-        def on_connect(cl, ud, flags, rc, properties=None):
-            if rc == 0:
-                log(f"[MQTT] Connected to {MQTT_HOST}:{MQTT_PORT}")
-                cl.subscribe(MQTT_TOPIC, qos=0)
-                log(f"[MQTT] Subscribed '{MQTT_TOPIC}'")
-            else:
-                log(f"[MQTT] connect failed rc={rc}")
-        client.on_connect = on_connect
-    else:
-        client = mqtt.Client()
-        def on_connect(cl, ud, flags, rc):
-            if rc == 0:
-                log(f"[MQTT] Connected to {MQTT_HOST}:{MQTT_PORT}")
-                cl.subscribe(MQTT_TOPIC, qos=0)
-                log(f"[MQTT] Subscribed '{MQTT_TOPIC}'")
-            else:
-                log(f"[MQTT] connect failed rc={rc}")
-        client.on_connect = on_connect
-
-    def on_message(cl, ud, msg):
-        try:
-            txt = msg.payload.decode("utf-8", errors="ignore")
-            obj = json.loads(txt)
-        except Exception:
-            log("[MQTT] <unparsed>")
-            return
-
-        det_label, conf, bbox = None, None, None
-        o = obj.get("object") or {}
-        for k in ("person", "vehicle", "car"):
-            if isinstance(o.get(k), dict) and "confidence" in o[k]:
-                det_label = k
-                conf = float(o[k]["confidence"])
-                break
-        bb = o.get("bbox") or {}
-        if bb:
-            bbox = (bb.get("topleftx"), bb.get("toplefty"),
-                    bb.get("bottomrightx"), bb.get("bottomrighty"))
-
-        if det_label is not None and conf is not None:
-            add_event({
-                "ts": obj.get("@timestamp"),
-                "label": det_label,
-                "confidence": conf,
-                "bbox": bbox,
-                "source": "mqtt",
-            })
-            log(f"[MQTT] {det_label} conf={conf} bbox={bbox}")
-            _trigger_devices()
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:  # keepalive pings
+            await asyncio.sleep(1.0)
+
+    # ---- paho callbacks (run on the event loop) ----
+    def _on_connect(self, cl, ud, flags, rc, properties=None):
+        if rc == 0:
+            self.connected = True
+            log(f"[MQTT] Connected to {MQTT_HOST}:{MQTT_PORT}")
+            cl.subscribe(MQTT_TOPIC, qos=0)
+            log(f"[MQTT] Subscribed '{MQTT_TOPIC}'")
         else:
-            log("[MQTT] json (no object)")
+            log(f"[MQTT] connect failed rc={rc}")
+            self._disconnected.set()
 
-    client.on_message = on_message
+    def _on_disconnect(self, cl, ud, *args):
+        self.connected = False
+        self._disconnected.set()
 
-    try:
-        log(f"[MQTT] Connecting to {MQTT_HOST}:{MQTT_PORT}…")
-        client.connect(MQTT_HOST, MQTT_PORT, keepalive=30)
-        client.loop_forever()
-    except Exception as e:
-        log(f"[MQTT] error: {e}")
+    def _on_message(self, cl, ud, msg):
+        self.received += 1
+        try:
+            self.queue.put_nowait((time.monotonic(), msg.payload))
+        except asyncio.QueueFull:
+            self.dropped += 1
 
-# start mqtt thread
-threading.Thread(target=_mqtt_loop, name="mqtt", daemon=True).start()
+    # ---- tasks ----
+    async def _connection(self):
+        import paho.mqtt.client as mqtt
+        if hasattr(mqtt, "CallbackAPIVersion"):
+            self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        else:
+            self.client = mqtt.Client()
+        c = self.client
+        c.on_connect = self._on_connect
+        c.on_disconnect = self._on_disconnect
+        c.on_message = self._on_message
+        c.on_socket_open = self._on_socket_open
+        c.on_socket_close = self._on_socket_close
+        c.on_socket_register_write = self._on_socket_register_write
+        c.on_socket_unregister_write = self._on_socket_unregister_write
+
+        backoff = 1.0
+        while True:
+            self._disconnected.clear()
+            try:
+                log(f"[MQTT] Connecting to {MQTT_HOST}:{MQTT_PORT}…")
+                await self.loop.run_in_executor(None, c.connect, MQTT_HOST, MQTT_PORT, 30)  # DNS/TCP off the loop
+                t0 = time.monotonic()
+                await self._disconnected.wait()
+                if time.monotonic() - t0 > 60.0:
+                    backoff = 1.0  # connection was healthy for a while
+                log("[MQTT] disconnected")
+            except Exception as e:
+                log(f"[MQTT] error: {e}")
+            try:
+                c.disconnect()
+            except Exception:
+                pass
+            self.connected = False
+            self.reconnects += 1
+            log(f"[MQTT] reconnecting in {backoff:.0f}s")
+            await asyncio.sleep(backoff * random.uniform(0.8, 1.2))
+            backoff = min(MQTT_BACKOFF_MAX, backoff * 2)
+
+    async def _consumer(self):
+        while True:
+            first = await self.queue.get()
+            batch = [first]
+            while len(batch) < MQTT_BATCH and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                payloads = [p for _, p in batch]
+                if self._record is not None:
+                    self._record.write(b"".join(p.replace(b"\n", b" ") + b"\n" for p in payloads))
+                found = False
+                for dets in ds_payload.decode_batch(payloads):  # one parse for the whole batch
+                    if dets is None:
+                        self.unparsed += 1
+                        log("[MQTT] <unparsed>")
+                    elif _apply_detections(dets):
+                        self.detections += len(dets)
+                        found = True
+                if found:
+                    _trigger_devices()  # once per batch, not once per message
+            except Exception as e:  # keep consuming: a dead task would silently drop every later message
+                self.errors += 1
+                log(f"[MQTT] batch of {len(batch)} failed: {e!r}")
+            self.batches += 1
+            self.lag_last = time.monotonic() - batch[0][0]
+            self.lag_max = max(self.lag_max, self.lag_last)
+            await asyncio.sleep(0)  # let the broker socket and HTTP handlers run
+
+    # ---- lifespan ----
+    async def start(self):
+        try:
+            import paho.mqtt.client  # noqa: F401
+        except Exception as e:
+            log(f"[MQTT] paho not available: {e}")
+            return
+        self.loop = asyncio.get_running_loop()
+        if MQTT_RECORD:
+            self._record = open(MQTT_RECORD, "ab")
+            log(f"[MQTT] recording payloads to {MQTT_RECORD}")
+        self.queue = asyncio.Queue(maxsize=MQTT_QUEUE_MAX)
+        self._disconnected = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._connection(), name="mqtt"),
+                       asyncio.create_task(self._consumer(), name="mqtt-consumer")]
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.client is not None:
+            try:
+                self.client.disconnect()
+            except Exception:
+                pass
+        if self._record is not None:
+            self._record.close()
+            self._record = None
+        self.connected = False
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "received": self.received,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "unparsed": self.unparsed,
+            "errors": self.errors,
+            "detections": self.detections,
+            "batches": self.batches,
+            "avg_batch": round((self.received - self.dropped) / max(1, self.batches), 1),
+            "lag_ms": round(1000 * self.lag_last, 1),
+            "lag_max_ms": round(1000 * self.lag_max, 1),
+            "reconnects": self.reconnects,
+            "json": ds_payload.JSON_BACKEND,
+        }
+
+_mqtt = _MqttConsumer()
 
 # -------------------------------------------------
 # PTZ (Dahua) endpoints
@@ -373,6 +660,7 @@ def clear():
     global SQUELCH_UNTIL
     _logs.clear()
     _events.clear()
+    _hub.publish("clear", {})
     SQUELCH_UNTIL = time.time() + 1.0
     return {"ok": True}
 
@@ -396,12 +684,124 @@ def simulate():
 # Feeds + GUI
 # -------------------------------------------------
 @app.get("/logs")
-def get_logs():
-    return {"lines": list(_logs)}
+def get_logs(since: Optional[int] = None, limit: Optional[int] = None):
+    """All buffered lines, or with ``since`` only the lines after that seq (check ``gap``)."""
+    lines, seq, gap = _logs.since(since or 0, limit)
+    return {"lines": lines, "seq": seq, "gap": gap if since is not None else False}
 
 @app.get("/events")
-def get_events(limit: int = 30):
-    return {"items": list(_events)[-limit:]}
+def get_events(limit: int = 30, since: Optional[int] = None):
+    """The newest ``limit`` events, or with ``since`` the events after that seq (check ``gap``)."""
+    if since is None:
+        items, seq = _events.tail(limit)
+        return {"items": items, "seq": seq, "gap": False}
+    items, seq, gap = _events.since(since, limit)
+    return {"items": items, "seq": seq, "gap": gap}
+
+def _sse(kind: str, data, eid: Optional[str] = None) -> str:
+    head = f"id: {eid}\n" if eid else ""
+    return f"{head}event: {kind}\ndata: {json.dumps(data)}\n\n"
+
+def _resume(last_id: Optional[str], limit: int) -> str:
+    """Catch-up for a reconnecting client (``Last-Event-ID`` = "log:event"), or a full snapshot."""
+    try:
+        log_seq, evt_seq = (int(x) for x in (last_id or "").split(":"))
+    except ValueError:
+        log_seq = evt_seq = None
+    if log_seq is not None:
+        lines, lseq, lgap = _logs.since(log_seq)
+        items, eseq, egap = _events.since(evt_seq)
+        _hub.advance(lseq, eseq)
+        if not (lgap or egap):
+            return "".join([_sse("log", {"seq": lseq - len(lines) + 1 + i, "line": ln}) for i, ln in enumerate(lines)] +
+                           [_sse("event", it) for it in items] +
+                           [f"id: {lseq}:{eseq}\n\n"])  # moves the client's Last-Event-ID forward
+    lines, lseq = _logs.tail()
+    items, eseq = _events.tail(limit)
+    _hub.advance(lseq, eseq)
+    return _sse("snapshot", {"lines": lines, "items": items, "log_seq": lseq, "event_seq": eseq},
+                f"{lseq}:{eseq}")
+
+@app.get("/stream")
+async def stream(request: Request, limit: int = 30):
+    """Push channel: a snapshot (or a catch-up after a reconnect), then only new log lines and events."""
+    client = _hub.subscribe()
+
+    async def gen():
+        try:
+            # subscribed first, so nothing is missed; the client drops repeats by seq
+            yield _resume(request.headers.get("last-event-id"), limit)
+            while True:
+                try:
+                    first = await asyncio.wait_for(client.queue.get(), timeout=KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                batch = [first]
+                while not client.queue.empty():
+                    batch.append(client.queue.get_nowait())
+                chunk = "".join(_sse(kind, data, eid) for kind, data, eid in batch)
+                if client.unreported:
+                    chunk = _sse("dropped", {"count": client.unreported}) + chunk
+                    client.unreported = 0
+                client.sent += len(batch)
+                yield chunk  # one write per wake-up, however many items queued meanwhile
+        finally:
+            _hub.unsubscribe(client)
+
+    return StreamingResponse(gen(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/stream/stats")
+def stream_stats():
+    return _hub.stats()
+
+@app.get("/mqtt/stats")
+def mqtt_stats():
+    return _mqtt.stats()
+
+# -------------------------------------------------
+# Event history (SQLite store)
+# -------------------------------------------------
+def _time_range(start: Optional[str], end: Optional[str]):
+    """(start, end) in unix seconds; ValueError for a non-empty value that does not parse."""
+    out = []
+    for name, value in (("start", start), ("end", end)):
+        ts = parse_ts(value)
+        if ts is None and value:
+            raise ValueError(f"bad {name}: {value!r} (unix seconds or ISO-8601)")
+        out.append(ts)
+    return out
+
+@app.get("/events/history")
+def events_history(start: Optional[str] = None, end: Optional[str] = None,
+                   label: Optional[str] = None, camera: Optional[str] = None,
+                   limit: int = 100, cursor: Optional[str] = None):
+    """Stored events, newest first. start/end: unix seconds or ISO-8601; pass ``next`` back as cursor."""
+    try:
+        t0, t1 = _time_range(start, end)
+    except ValueError as e:
+        return JSONResponse({"ok": False, "error": str(e)}, status_code=400)
+    try:
+        items, nxt = _store.query(t0, t1, label, camera, max(1, min(limit, 1000)), cursor)
+    except ValueError:
+        return JSONResponse({"ok": False, "error": "bad cursor"}, status_code=400)
+    return {"items": items, "next": nxt}
+
+@app.get("/events/summary")
+def events_summary(start: Optional[str] = None, end: Optional[str] = None, camera: Optional[str] = None):
+    """Per-class counts in a time range (default: everything retained)."""
+    try:
+        t0, t1 = _time_range(start, end)
+    except ValueError as e:
+        return JSONResponse({"ok": False, "error": str(e)}, status_code=400)
+    return {"classes": _store.summary(t0, t1, camera)}
+
+@app.get("/events/store")
+def events_store():
+    return _store.stats()
 
 @app.get("/")
 def root():
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Microbenchmark: DeepStream msgconv payload decoding.
+
+Record real payloads with MQTT_RECORD=/path/payloads.jsonl when running app.py,
+or let this script synthesise a mix of full- and minimal-schema messages:
+
+    python3 benchmark_payload.py --payloads payloads.jsonl --batch 200
+"""
+import argparse, json, random, time
+import ds_payload
+
+def synth(n: int, seed: int = 0):
+    """n payloads (bytes): 50% full schema, 50% minimal with 1-4 objects, all four classes."""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        ts = f"2026-10-17T10:{i // 600 % 60:02d}:{i // 10 % 60:02d}.{i % 10}00Z"
+        if i % 2:
+            label = rnd.choice(ds_payload.CLASSES)
+            x, y = rnd.uniform(0, 1600), rnd.uniform(0, 900)
+            msg = {"messageid": f"m{i}", "mdsversion": "1.0", "@timestamp": ts,
+                   "sensor": {"id": "CAM_01", "type": "Camera"},
+                   "object": {"id": str(rnd.randint(1, 50)), "speed": 0.0,
+                              label: {"confidence": round(rnd.uniform(0.3, 1.0), 3)},
+                              "bbox": {"topleftx": x, "toplefty": y,
+                                       "bottomrightx": x + 120, "bottomrighty": y + 80}},
+                   "event": {"id": f"e{i}", "type": "moving"}}
+        else:
+            objs = []
+            for _ in range(rnd.randint(1, 4)):
+                x, y = rnd.randint(0, 1600), rnd.randint(0, 900)
+                objs.append(f"{rnd.randint(1, 50)}|{x}|{y}|{x + 120}|{y + 80}|"
+                            f"{rnd.choice(ds_payload.CLASSES)}|#|{rnd.uniform(0.3, 1.0):.3f}")
+            msg = {"version": "4.0", "id": str(i), "@timestamp": ts, "sensorId": "CAM_01", "objects": objs}
+        out.append(json.dumps(msg).encode())
+    return out
+
+def legacy(payload):
+    """What app.py did before: generic json.loads, then probe for person/vehicle/car."""
+    try:
+        obj = json.loads(payload.decode("utf-8", errors="ignore"))
+    except Exception:
+        return []
+    o = obj.get("object") or {}
+    for k in ("person", "vehicle", "car"):
+        if isinstance(o.get(k), dict) and "confidence" in o[k]:
+            return [(k, float(o[k]["confidence"]))]
+    return []
+
+def run(name, fn, payloads, repeat):
+    best, objects = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        objects = fn(payloads)
+        best = min(best, time.perf_counter() - t0)
+    rate = len(payloads) / best
+    print(f"{name:<28} {rate:>12,.0f} msg/s  {1e6 / rate:>7.2f} us/msg  {objects:>8} objects")
+    return rate
+
+def main():
+    ap = argparse.ArgumentParser(description="DeepStream payload decode microbenchmark")
+    ap.add_argument("--payloads", help="recorded payloads, one JSON message per line (default: synthetic)")
+    ap.add_argument("-n", type=int, default=20000, help="synthetic messages")
+    ap.add_argument("--batch", type=int, default=200, help="messages per decode_batch call (MQTT_BATCH)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.payloads:
+        with open(args.payloads, "rb") as f:
+            payloads = [ln.rstrip(b"\n") for ln in f if ln.strip()]
+    else:
+        payloads = synth(args.n)
+    print(f"{len(payloads)} payloads, JSON backend: {ds_payload.JSON_BACKEND}")
+
+    def batched(ps):
+        return sum(len(d or ()) for i in range(0, len(ps), args.batch)
+                   for d in ds_payload.decode_batch(ps[i:i + args.batch]))
+
+    base = run("legacy json + probe", lambda ps: sum(len(legacy(p)) for p in ps), payloads, args.repeat)
+    run("ds_payload.decode", lambda ps: sum(len(ds_payload.decode(p) or ()) for p in ps), payloads, args.repeat)
+    rate = run(f"ds_payload.decode_batch({args.batch})", batched, payloads, args.repeat)
+    print(f"decode_batch vs legacy: {rate / base:.2f}x (legacy finds none of {', '.join(ds_payload.CLASSES)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Decoder for DeepStream nvmsgconv payloads (minimal and full schema).
+
+Full schema (msg-conv-payload-type=0), one object per message:
+    {"@timestamp": ..., "sensor": {"id": ...},
+     "object": {"id": "<track>", "<type>": {..., "confidence": c},
+                "bbox": {"topleftx": .., "toplefty": .., "bottomrightx": .., "bottomrighty": ..}}}
+
+Minimal schema (msg-conv-payload-type=1), all objects of a frame:
+    {"@timestamp": ..., "sensorId": ..., "objects": ["<track>|x1|y1|x2|y2|<label>[|#|attrs...|conf]", ...]}
+
+Every object becomes one compact Detection tuple, whatever its class.
+"""
+import json
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+try:
+    import orjson
+    _loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    _loads = json.loads
+    JSON_BACKEND = "json"
+
+CLASSES = ("cow", "nilgai", "water buffalo", "dog")  # Dataset/data.yaml order
+UNTRACKED = (1 << 64) - 1  # DeepStream's object id without a tracker
+_NOT_A_TYPE = {"bbox", "location", "coordinate", "pose", "embedding", "signature"}
+
+class Detection(NamedTuple):
+    ts: Optional[str]
+    sensor: str
+    track: int            # -1 when the pipeline has no tracker
+    label: str
+    cls: int              # index into CLASSES, -1 for anything else
+    conf: Optional[float]
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+
+@lru_cache(maxsize=256)
+def _label(raw: str):
+    """('water buffalo', 2) for 'Water_Buffalo', 'water-buffalo', ...; unknown labels are kept as-is."""
+    name = raw.strip().lower().replace("_", " ").replace("-", " ")
+    try:
+        return name, CLASSES.index(name)
+    except ValueError:
+        return name, -1
+
+def _track(v) -> int:
+    try:
+        t = int(v)
+    except (TypeError, ValueError):
+        return -1
+    return -1 if t == UNTRACKED else t
+
+def _minimal(s: str, ts, sensor) -> Optional[Detection]:
+    f = s.split("|")
+    if len(f) < 6:
+        return None
+    conf = None
+    if len(f) > 6:
+        try:
+            conf = float(f[-1])
+        except ValueError:
+            pass
+    label, cls = _label(f[5])
+    try:
+        return Detection(ts, sensor, _track(f[0]), label, cls, conf,
+                         float(f[1]), float(f[2]), float(f[3]), float(f[4]))
+    except ValueError:
+        return None
+
+def _full(o: dict, ts, sensor) -> Optional[Detection]:
+    raw, conf = o.get("label") or o.get("objectType"), o.get("confidence")
+    if raw is None or conf is None:
+        for k, v in o.items():
+            if type(v) is dict and k not in _NOT_A_TYPE:
+                raw = raw or k
+                if conf is None:
+                    conf = v.get("confidence")
+                break
+    if raw is None:
+        return None
+    bb = o.get("bbox") or {}
+    label, cls = _label(raw)
+    return Detection(ts, sensor, _track(o.get("id")), label, cls,
+                     None if conf is None else float(conf),
+                     float(bb.get("topleftx") or 0), float(bb.get("toplefty") or 0),
+                     float(bb.get("bottomrightx") or 0), float(bb.get("bottomrighty") or 0))
+
+def detections(msg: dict) -> List[Detection]:
+    """All objects of one already-parsed message (either schema)."""
+    ts = msg.get("@timestamp")
+    out = []
+    objs = msg.get("objects")
+    if objs is not None:
+        sensor = str(msg.get("sensorId") or "")
+        for s in objs:
+            d = _minimal(s, ts, sensor) if type(s) is str else _full(s, ts, sensor) if type(s) is dict else None
+            if d is not None:
+                out.append(d)
+        return out
+    o = msg.get("object")
+    if type(o) is dict:
+        sensor = msg.get("sensor")
+        sensor = str(sensor.get("id") or "") if type(sensor) is dict else str(msg.get("sensorId") or "")
+        d = _full(o, ts, sensor)
+        if d is not None:
+            out.append(d)
+    return out
+
+def decode(payload) -> Optional[List[Detection]]:
+    """Detections of one payload (bytes or str); None if it is not a JSON object."""
+    try:
+        msg = _loads(payload)
+    except ValueError:
+        return None
+    return detections(msg) if type(msg) is dict else None
+
+def decode_batch(payloads) -> List[Optional[List[Detection]]]:
+    """decode() for many payloads; parses them as one JSON array when they are all valid."""
+    if not payloads:
+        return []
+    try:
+        raw = [p if isinstance(p, bytes) else p.encode() for p in payloads]
+        msgs = _loads(b"[" + b",".join(raw) + b"]")
+    except ValueError:
+        return [decode(p) for p in payloads]  # some payload is broken: isolate it
+    if len(msgs) != len(payloads):  # a payload held more than one value ("{...},{...}")
+        return [decode(p) for p in payloads]
+    return [detections(m) if type(m) is dict else None for m in msgs]
@@ -0,0 +1,244 @@
+"""Persistent detection events: SQLite in WAL mode, written in batches by one thread.
+
+add() only appends to an in-memory queue; the writer thread inserts whatever
+accumulated every ``flush_interval`` seconds (or ``batch`` rows) in a single
+transaction, so MQTT bursts cost one fsync-free commit per batch instead of
+one per event. Readers use their own connections and, thanks to WAL, never
+wait for the writer. Rows older than ``retention_days`` are pruned hourly.
+"""
+import math, os, re, time, sqlite3, threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,              -- unix seconds (event @timestamp, else arrival time)
+    camera TEXT NOT NULL DEFAULT '',
+    label TEXT NOT NULL,
+    confidence REAL,
+    track INTEGER,
+    x1 REAL, y1 REAL, x2 REAL, y2 REAL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events(ts);
+CREATE INDEX IF NOT EXISTS events_label_ts ON events(label, ts);
+CREATE INDEX IF NOT EXISTS events_camera_ts ON events(camera, ts);
+"""
+COLUMNS = ("id", "ts", "camera", "label", "confidence", "track", "x1", "y1", "x2", "y2", "source")
+_INSERT = ("INSERT INTO events (ts, camera, label, confidence, track, x1, y1, x2, y2, source) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+_OFFSET_SPACE = re.compile(r" (\d{2}:?\d{2})$")  # "+05:30" after an unencoded query string
+
+def parse_ts(value, default: Optional[float] = None) -> Optional[float]:
+    """Unix seconds from a number or an ISO-8601 string ("Z" and "+hh:mm" sent as " hh:mm" included).
+
+    Anything that does not parse to a finite time gives ``default``.
+    """
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else default
+    value = value.strip()
+    try:
+        ts = float(value)
+        return ts if math.isfinite(ts) else default
+    except ValueError:
+        pass
+    try:
+        dt = datetime.fromisoformat(_OFFSET_SPACE.sub(r"+\1", value.replace("Z", "+00:00")))
+    except ValueError:
+        return default
+    if dt.tzinfo is None:
+        dt = dt.astimezone()  # naive: local time
+    return dt.astimezone(timezone.utc).timestamp()
+
+def _row(it: dict):
+    bbox = it.get("bbox") or (None, None, None, None)
+    return (parse_ts(it.get("ts"), time.time()), str(it.get("sensor") or ""), str(it.get("label") or ""),
+            it.get("confidence"), it.get("track"), *bbox[:4], it.get("source"))
+
+class EventStore:
+    def __init__(self, path: str, batch: int = 1000, flush_interval: float = 0.5,
+                 retention_days: float = 30.0, prune_interval: float = 3600.0, max_pending: int = 100000):
+        self.path = path
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+        self._pending = deque()
+        self.max_pending = max_pending
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._local = threading.local()
+
+        # Counters
+        self.inserted = 0
+        self.batches = 0
+        self.dropped = 0           # writer fell max_pending rows behind
+        self.pruned = 0
+        self.errors = 0
+        self.last_batch_ms = 0.0
+
+    # ---- connections ----
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")   # durable at checkpoints; WAL keeps it consistent
+        con.execute("PRAGMA temp_store=MEMORY")
+        return con
+
+    def _reader(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = self._connect()
+        return con
+
+    # ---- lifecycle ----
+    def start(self):
+        if self._running:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        con = self._connect()
+        con.executescript(SCHEMA)
+        con.close()
+        self._running = True
+        self._thread = threading.Thread(target=self._writer, name="event-store", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 5.0):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ---- writes ----
+    def add(self, it: dict):
+        """Queue one event dict (as built by app.add_event); never blocks."""
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append(_row(it))
+        if len(self._pending) >= self.batch:
+            self._wake.set()
+
+    def _flush(self, con: sqlite3.Connection):
+        while self._pending:
+            n = min(len(self._pending), self.batch)
+            rows = [self._pending.popleft() for _ in range(n)]
+            t0 = time.perf_counter()
+            try:
+                with con:  # one transaction per batch
+                    con.executemany(_INSERT, rows)
+            except sqlite3.Error as e:
+                self.errors += 1
+                print(f"[STORE] insert failed ({n} rows lost): {e}", flush=True)
+                continue
+            self.last_batch_ms = 1000 * (time.perf_counter() - t0)
+            self.inserted += n
+            self.batches += 1
+
+    def prune(self, con: Optional[sqlite3.Connection] = None, chunk: int = 5000) -> int:
+        """Delete rows older than retention_days, a chunk per transaction."""
+        con = con or self._reader()
+        cutoff = time.time() - self.retention_days * 86400.0
+        total = 0
+        while True:
+            with con:
+                cur = con.execute("DELETE FROM events WHERE id IN "
+                                  "(SELECT id FROM events WHERE ts < ? LIMIT ?)", (cutoff, chunk))
+            total += cur.rowcount
+            if cur.rowcount < chunk:
+                break
+        if total:
+            con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.pruned += total
+        return total
+
+    def _writer(self):
+        con = self._connect()
+        next_prune = time.monotonic()
+        try:
+            while self._running or self._pending:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self._flush(con)
+                if self.retention_days and time.monotonic() >= next_prune:
+                    try:
+                        self.prune(con)
+                    except sqlite3.Error as e:
+                        print(f"[STORE] prune failed: {e}", flush=True)
+                    next_prune = time.monotonic() + self.prune_interval
+        finally:
+            con.close()
+
+    # ---- reads ----
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              label: Optional[str] = None, camera: Optional[str] = None,
+              limit: int = 100, cursor: Optional[str] = None):
+        """Newest-first page of events in [start, end); returns (rows, next_cursor).
+
+        Keyset pagination: ``cursor`` is "<ts>:<id>" of the last row of the
+        previous page, so deep pages cost the same as the first one.
+        """
+        where, args = [], []
+        if start is not None:
+            where.append("ts >= ?"); args.append(start)
+        if end is not None:
+            where.append("ts < ?"); args.append(end)
+        if label:
+            where.append("label = ?"); args.append(label)
+        if camera:
+            where.append("camera = ?"); args.append(camera)
+        if cursor:
+            cts, cid = cursor.split(":")
+            where.append("(ts, id) < (?, ?)"); args += [float(cts), int(cid)]
+        sql = f"SELECT {', '.join(COLUMNS)} FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+        rows = [dict(zip(COLUMNS, r)) for r in self._reader().execute(sql, args + [limit])]
+        nxt = f"{rows[-1]['ts']!r}:{rows[-1]['id']}" if len(rows) == limit else None
+        return rows, nxt
+
+    def summary(self, start: Optional[float] = None, end: Optional[float] = None,
+                camera: Optional[str] = None):
+        """Event count, max confidence and last time per label within [start, end)."""
+        where, args = [], []
+        if start is not None:
+            where.append("ts >= ?"); args.append(start)
+        if end is not None:
+            where.append("ts < ?"); args.append(end)
+        if camera:
+            where.append("camera = ?"); args.append(camera)
+        sql = "SELECT label, COUNT(*), MAX(confidence), MAX(ts) FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " GROUP BY label ORDER BY COUNT(*) DESC"
+        return [{"label": l, "count": n, "max_confidence": c, "last_ts": t}
+                for l, n, c, t in self._reader().execute(sql, args)]
+
+    def stats(self) -> dict:
+        size = 0
+        for suffix in ("", "-wal"):
+            try:
+                size += os.path.getsize(self.path + suffix)
+            except OSError:
+                pass
+        return {
+            "path": self.path,
+            "pending": len(self._pending),
+            "inserted": self.inserted,
+            "batches": self.batches,
+            "avg_batch": round(self.inserted / max(1, self.batches), 1),
+            "last_batch_ms": round(self.last_batch_ms, 2),
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "pruned": self.pruned,
+            "retention_days": self.retention_days,
+            "size_mb": round(size / 1e6, 2),
+        }
@@ -22,14 +22,42 @@ async function postJSON(url, body = {}) {
   return data;
 }
 
-function appendLog(line) {
+const LOG_MAX = 2000;     // same cap as the server's log buffer
+const EVT_SHOWN = 30;
+
+// one text node per line, so appending never re-renders the whole panel
+function appendLog(...lines) {
   const box = document.getElementById("logs");
   if (!box) return;
   const atBottom = box.scrollTop + box.clientHeight >= box.scrollHeight - 8;
-  box.textContent += (box.textContent ? "\n" : "") + line;
+  for (const line of lines) {
+    box.appendChild(document.createTextNode((box.firstChild ? "\n" : "") + line));
+  }
+  while (box.childNodes.length > LOG_MAX) {
+    box.removeChild(box.firstChild);
+    if (box.firstChild) box.firstChild.nodeValue = box.firstChild.nodeValue.replace(/^\n/, "");
+  }
   if (atBottom) box.scrollTop = box.scrollHeight;
 }
 
+function renderEvent(it) {
+  const c = it.confidence != null ? (Math.round(it.confidence*100)/100) : "";
+  const src = it.source || "";
+  const tid = it.track || "";
+  return `<div class="det">
+          <b>${it.label ?? "object"}</b>
+          <span>${c}</span>
+          <code>${src} ${tid ? ("track:"+tid) : ""}</code>
+        </div>`;
+}
+
+function addEvent(it) {
+  const list = document.getElementById("detections");
+  if (!list) return;
+  list.insertAdjacentHTML("beforeend", renderEvent(it));
+  while (list.children.length > EVT_SHOWN) list.removeChild(list.firstElementChild);
+}
+
 async function refreshStatus() {
   try {
     const r = await fetch("/status");
@@ -49,7 +77,7 @@ function setBusy(el, on) {
 }
 
 // ========= global UI state =========
-let isPaused = false;     // when true, no poll/animations
+let isPaused = false;     // when true, no new detections/animations
 let pollTimer = null;
 
 function setPaused(p) {
@@ -114,7 +142,7 @@ document.getElementById("btnRefresh")?.addEventListener("click", async (e) => {
   try { await fetch("/clear", {method:"POST"}); } catch {}
 
   // 3) clear UI + pause briefly so nothing fires
-  document.getElementById("logs").textContent = "";
+  document.getElementById("logs").replaceChildren();
   document.getElementById("detections").innerHTML = "";
   setPaused(true);
 
@@ -141,39 +169,82 @@ document.getElementById("btnSim")?.addEventListener("click", async () => {
   appendLog("[UI] simulate alert");
 });
 
-// ========= Poll logs + events =========
+// ========= Live logs + events (server push) =========
+let source = null;
+let logSeq = 0;           // newest log line / event shown, by server sequence number
+let evtSeq = 0;
+
+function connectStream() {
+  source = new EventSource(`/stream?limit=${EVT_SHOWN}`);
+  source.addEventListener("snapshot", (e) => {
+    const snap = JSON.parse(e.data);
+    logSeq = snap.log_seq;
+    evtSeq = snap.event_seq;
+    const box = document.getElementById("logs");
+    if (box) box.replaceChildren();
+    appendLog(...snap.lines);
+    const list = document.getElementById("detections");
+    if (list) list.innerHTML = snap.items.map(renderEvent).join("");
+  });
+  source.addEventListener("log", (e) => {
+    const m = JSON.parse(e.data);
+    if (m.seq <= logSeq) return;      // already part of the snapshot
+    logSeq = m.seq;
+    appendLog(m.line);
+  });
+  source.addEventListener("event", (e) => {
+    const it = JSON.parse(e.data);
+    if (it.seq <= evtSeq) return;
+    evtSeq = it.seq;
+    if (isPaused) return;
+    addEvent(it);
+    flashAlertOnce();
+  });
+  source.addEventListener("clear", () => {
+    document.getElementById("logs")?.replaceChildren();
+    const list = document.getElementById("detections");
+    if (list) list.innerHTML = "";
+  });
+  source.addEventListener("dropped", (e) => {
+    // this tab fell behind; start over from a fresh snapshot
+    appendLog(`[UI] ${JSON.parse(e.data).count} updates dropped, resyncing`);
+    source.close();
+    setTimeout(connectStream, 0);
+  });
+  // EventSource reconnects by itself (and gets a new snapshot) after network errors
+}
+
+// ========= Poll logs + events (fallback without EventSource) =========
+// only entries newer than the last seen sequence number are transferred
 async function poll() {
   if (isPaused) { pollTimer = setTimeout(poll, 800); return; }
 
   try {
-    const lj = await (await fetch("/logs")).json();
+    const lj = await (await fetch(`/logs?since=${logSeq}`)).json();
     const box = document.getElementById("logs");
-    if (box && lj.lines) box.textContent = lj.lines.join("\n");
+    if (box && lj.lines) {
+      if (lj.gap) box.replaceChildren();
+      appendLog(...lj.lines);
+      logSeq = lj.seq;
+    }
   } catch {}
 
   try {
-    const ej = await (await fetch("/events?limit=30")).json();
+    const ej = await (await fetch(`/events?since=${evtSeq}&limit=${EVT_SHOWN}`)).json();
     const list = document.getElementById("detections");
     if (list && ej.items) {
+      if (ej.gap) list.innerHTML = "";
+      ej.items.forEach(addEvent);
       // flash strobe/beep if there are new detections (UI-only)
       if (ej.items.length) flashAlertOnce();
-      list.innerHTML = ej.items.map(it => {
-        const c = it.confidence != null ? (Math.round(it.confidence*100)/100) : "";
-        const src = it.source || "";
-        const tid = it.track || "";
-        return `<div class="det">
-          <b>${it.label ?? "object"}</b>
-          <span>${c}</span>
-          <code>${src} ${tid ? ("track:"+tid) : ""}</code>
-        </div>`;
-      }).join("");
+      evtSeq = ej.seq;
     }
   } catch {}
 
   pollTimer = setTimeout(poll, 800);
 }
 refreshStatus();
-poll();
+if (window.EventSource) connectStream(); else poll();
 
 // ========= PTZ =========
 function currentSpeed(){
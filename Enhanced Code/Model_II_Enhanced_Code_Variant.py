@@ -1,9 +1,26 @@
-import serial
+import threading
 import time
 import cv2
-import torch
 from ultralytics import YOLO
 import numpy as np
+from frame_reader import LatestFrameReader, StreamSupervisor, open_http_capture
+from shm_ring import ShmFrameReader
+from preprocessing import FramePreprocessor
+from letterbox import Letterbox
+from actuator import SerialActuator
+from pipeline import Pipeline, Stage
+from metrics import Metrics
+from motion import MotionGate
+from scheduler import FrameScheduler
+from preview import PreviewServer
+from tiling import TiledDetector
+from dual_stream import DualStreamDetector
+from tracker import Tracker, draw_tracks
+from model_cache import StartupTimer, cached_export, warm_up
+from postprocess import as_records, select, draw_detections
+from detectors import UltralyticsDetector
+
+startup = StartupTimer()  # prints time-to-model, warm-up and first detection since launch
 
 # Dahua Camera Configuration
 DAHUA_IP = "192.168.188.37"  # Updated camera IP
@@ -11,118 +28,235 @@ USERNAME = "admin"  # Camera username
 PASSWORD = "ganesh762"  # Camera password
 http_url = f"http://{USERNAME}:{PASSWORD}@{DAHUA_IP}/cgi-bin/mjpg/video.cgi?channel=1&subtype=1"  # Use subtype=1 for smoother stream
 
-# Serial communication with Arduino
-ser = serial.Serial('/dev/ttyACM0', 9600, timeout=1)  # Adjust port if necessary
+# Tiled inference for small, distant animals: read the main stream (subtype=0)
+# and run overlapping 640x640 tiles at native resolution instead of one squeezed frame
+TILED = False
+if TILED:
+    http_url = http_url.replace("subtype=1", "subtype=0")
+
+# Dual stream: the motion gate keeps watching the cheap sub-stream and only the
+# moving regions, cut from the main stream (subtype=0), go to YOLO. The main
+# stream is opened on motion and closed after 10 quiet seconds, so decoding and
+# inference scale with activity (needs MOTION_GATE; leave TILED off)
+DUAL_STREAM = False
+main_url = http_url.replace("subtype=1", "subtype=0")
+
+# MULTIPROCESS decodes in a separate capture process that writes frames into a
+# shared-memory ring, so decoding no longer competes with inference for the GIL.
+# The process is forked here, before the model and any thread exist (forking a
+# multithreaded process can deadlock OpenMP/OpenCV thread pools); reconnects
+# only reopen the stream inside it
+MULTIPROCESS = False
+capture_proc = ShmFrameReader(http_url, fps=10, width=640, height=480).launch() if MULTIPROCESS else None
+
+# Serial communication with Arduino (writer thread; sends only when the LED/buzzer state changes)
+actuator = SerialActuator('/dev/ttyACM0', 9600, min_on=2.0)  # Adjust port if necessary
 
-# Load YOLOv8 Model
+# Load YOLOv8 Model. FAST_START loads a fused TorchScript export cached in
+# ~/.cache/nilbye (keyed by the weights' SHA-256) instead of unpickling best.pt
+# on every launch; the first launch after retraining creates it
+FAST_START = True
 model_path = "/home/lain/yolov5/runs_final/YOLO8_1M/weights/best.pt" 
-model = YOLO(model_path)
-
-# Camera Initialization
-cap = cv2.VideoCapture(http_url)  # Use HTTP instead of RTSP
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer size for lower latency
-cap.set(cv2.CAP_PROP_FPS, 10)  # Lower FPS to prevent lag
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)  # Reduce resolution for stability
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-
-if not cap.isOpened():
-    print("Error: Cannot open HTTP stream.")
-    exit()
+model = YOLO(cached_export(model_path, "torchscript", imgsz=640) if FAST_START else model_path, task="detect")
+startup.mark("model loaded")
+
+# Instrumentation: rolling p50/p95/p99 per stage, rewritten to metrics.json every 10 s
+metrics = Metrics()
+metrics.start_dump("metrics.json", interval=10.0, echo=True)
+METRICS_PORT = None  # e.g. 8765 to also serve http://127.0.0.1:8765/metrics
+if METRICS_PORT:
+    metrics.serve(METRICS_PORT)
+
+# Camera Initialization (background reader keeps only the newest frame)
+if capture_proc is not None:
+    reader = capture_proc
+else:
+    reader = LatestFrameReader(lambda: open_http_capture(http_url, fps=10, width=640, height=480), metrics=metrics)
+
+# Stream watchdog: when no frame arrived for MAX_TIMEOUT seconds the reader is
+# reconnected in the background (jittered exponential backoff); meanwhile the
+# last frame is served marked stale and the LED/buzzer is forced off
+MAX_TIMEOUT = 5
+stream = StreamSupervisor(reader, stall_timeout=MAX_TIMEOUT, on_down=lambda: actuator.set(False))
+
+if not stream.start():
+    print("Error: Cannot open HTTP stream. Retrying in the background...")
 else:
     print("HTTP Stream is working with subtype=1!")
 
-# Image Processing Function
-def preprocess_frame(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    filtered = cv2.bilateralFilter(frame, 5, 50, 50) 
-    lab = cv2.cvtColor(filtered, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(6, 6))  
-    l = clahe.apply(l)
-    lab = cv2.merge((l, a, b))
-    enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
-
-    sharpen_kernel = np.array([[0, -0.5, 0],
-                               [-0.5, 3, -0.5],
-                               [0, -0.5, 0]]) 
-    
-    sharpened = cv2.filter2D(enhanced, -1, sharpen_kernel)
-    gamma = 1.1  
-    inv_gamma = 1.0 / gamma
-    table = np.array([(i / 255.0) ** inv_gamma * 255 for i in np.arange(0, 256)]).astype("uint8")
-    corrected = cv2.LUT(sharpened, table)
-    
-    return corrected
-
-# LED and Buzzer Control
-def control_led(state):
-    if ser.is_open:
-        command = b'1' if state else b'0'
-        ser.write(command)
-        print(f"🟢 LED {'ON' if state else 'OFF'} sent to Arduino ({command})")
-    else:
-        print("⚠️ Error: Serial port is not open!")
+# Image Processing
+letterbox = Letterbox((640, 640))  # Keeps aspect ratio; scale/padding cached for the stream geometry
+preprocessor = FramePreprocessor(letterbox=letterbox)  # CLAHE/kernel/LUT built once, filters run at inference size
+
+CONFIDENCE_THRESHOLD = 0.80  # Lower confidence threshold to detect more objects
 
-def control_buzzer(state):
-    if ser.is_open:
-        command = b'1' if state else b'0'
-        ser.write(command)
-        print(f"🔊 Buzzer {'ON' if state else 'OFF'} sent to Arduino ({command})")
+# Pipeline: capture, preprocessing and inference run on worker threads;
+# annotation, actuation and display stay on the main thread
+detector = UltralyticsDetector(model, device='cpu', metrics=metrics)  # Ensure it runs on CPU without excessive load
+warm_up(detector, (640, 640))  # first-inference allocations happen now, not on the first camera frame
+startup.mark("warm-up done")
+INFER_WORKERS = 1  # >1 overlaps inference of consecutive frames on multi-core CPUs
+
+# Motion gating: skip preprocessing and YOLO while the field is static, forcing
+# a refresh every few seconds so animals standing still are not missed (boxes
+# of the last inference are reused for up to `refresh` seconds meanwhile)
+MOTION_GATE = False
+gate = MotionGate(method="diff", hold=2.0, refresh=5.0) if MOTION_GATE else None
+last_det = np.zeros((0, 6), dtype=np.float32)  # boxes from the newest inferred frame
+last_det_ts = 0.0  # its frame time
+last_det_lock = threading.Lock()  # infer workers (INFER_WORKERS > 1) finish out of order
+tiler = TiledDetector(detector, tile=640, overlap=0.2) if TILED else None
+dual = None
+if DUAL_STREAM and gate is not None:
+    dual = DualStreamDetector(lambda: open_http_capture(main_url, fps=10, width=1920, height=1080), detector, idle=10.0)
+
+# Tracking: animals keep their identity across frames and coast on a Kalman
+# prediction through frames not run through YOLO. The deterrent follows
+# confirmed tracks (3 matches), so one false positive never fires it and the
+# motion gate / scheduler can skip inference without the buzzer flickering.
+# Off by default: waiting for 3 matches delays the alert by two processed
+# frames (seconds when the scheduler skips heavily) vs. the per-frame trigger
+TRACKING = False
+tracker = Tracker(high=CONFIDENCE_THRESHOLD, min_hits=3, max_age=6.0) if TRACKING else None
+
+# Adaptive frame skipping: drop more frames while decode -> display latency is
+# above the target, fewer once it recovers (skip rate is printed every 10 s)
+TARGET_LATENCY = 0.25  # seconds
+scheduler = FrameScheduler(target_latency=TARGET_LATENCY)
+
+# Headless mode (field device): no cv2 window; boxes are only drawn while a
+# browser is connected to the MJPEG preview at http://<device>:PREVIEW_PORT/
+HEADLESS = False
+PREVIEW_PORT = 8080
+preview = PreviewServer(PREVIEW_PORT, fps=5) if HEADLESS else None
+
+def capture():
+    ret, frame, ts, stale = stream.read(timeout=1.0)  # Newest frame only; stale ones are dropped by the reader
+    if ret and stale:
+        return {"frame": frame, "ts": ts, "stale": True, "infer": False}  # stream down: last good frame
+    if not ret or not scheduler.offer(ts):
+        return None
+    return {"frame": frame, "ts": ts}
+
+def motion(pkt):
+    if pkt.get("stale"):
+        return pkt
+    pkt["infer"] = gate(pkt["frame"], pkt["ts"])
+    pkt["regions"] = gate.regions() if gate.moving else None  # tile only where something moved
+    if dual is not None and not gate.moving:
+        dual.poll(pkt["ts"])  # closes the main stream once the field has been quiet for a while
+    return pkt
+
+def preprocess(pkt):
+    if not pkt.get("infer", True):
+        return pkt
+    if dual is not None and pkt.get("regions"):
+        pkt["crops"] = dual.prepare(pkt["frame"], pkt["regions"], pkt["ts"])  # main-stream crops around the motion
+        if pkt["crops"] is not None:
+            return pkt  # crops are copies; the sub frame is not read here
+    if tiler is not None:
+        pkt["tiles"] = tiler.prepare(pkt["frame"], pkt.get("regions"))
+        return pkt if stream.valid(pkt["ts"]) else None
+    pkt["img"] = preprocessor(pkt["frame"]).copy()  # preprocessor reuses its buffer for the next frame
+    if not stream.valid(pkt["ts"]):
+        return None  # shared-memory slot was overwritten while we read it
+    return pkt
+
+def infer(pkt):
+    global last_det, last_det_ts
+    if pkt.get("stale"):
+        pkt["det"] = last_det[:0]  # stream down: no boxes on the frozen frame
+    elif pkt.get("infer", True):
+        if pkt.get("crops") is not None:
+            det = dual.detect(pkt["crops"])  # boxes mapped back to sub-stream pixels
+        elif tiler is not None:
+            det = tiler.detect(pkt["tiles"])  # one batch for all tiles, merged with class-aware NMS
+        else:
+            det = letterbox.to_source(detector(pkt["img"]))  # boxes in camera-frame pixels
+        pkt["det"] = det
+        with last_det_lock:
+            if pkt["ts"] > last_det_ts:  # a slower worker never replaces a newer frame's boxes
+                last_det, last_det_ts = det, pkt["ts"]
     else:
-        print("⚠️ Error: Serial port is not open!")
+        with last_det_lock:
+            pkt["det"] = last_det  # nothing moved: the previous boxes still hold
+    return pkt
 
-previous_detection_led = False
-previous_detection_buzzer = False
-CONFIDENCE_THRESHOLD = 0.80  # Lower confidence threshold to detect more objects
+stages = [Stage("preprocess", preprocess), Stage("infer", infer, workers=INFER_WORKERS)]
+if gate is not None:
+    stages.insert(0, Stage("motion", motion))
+pipeline = Pipeline(capture, stages, metrics=metrics).start()
 
 # Detection Loop
 while True:
-    for _ in range(3):  # Skip every 3 frames to reduce lag
-        cap.grab()  # Grab frame but don't decode it
+    pkt = pipeline.get(timeout=1.0)
     
-    ret, frame = cap.read()
+    if pkt is None:
+        continue  # reconnects are handled by the stream watchdog
+    frame = pkt["frame"]
+    stale = pkt.get("stale", False)
     
-    if not ret or frame is None or frame.size == 0:
-        print("Frame error detected! Skipping...")
-        continue
+    with metrics.time("postprocess"):
+        hits = select(as_records(pkt["det"]), CONFIDENCE_THRESHOLD)  # one vector mask for the whole frame
+    detection_found = len(hits) > 0
+    if tracker is not None and not stale:
+        with metrics.time("tracking"):
+            if pkt.get("infer", True):
+                tracks = tracker.update(pkt["det"], pkt["ts"])  # low-confidence boxes only extend existing tracks
+            else:
+                tracks = tracker.predict(pkt["ts"])  # no inference on this frame: coast
+        detection_found = tracker.alert()
     
-    last_frame_time = time.time()  # Track frame time to monitor lag
-    frame_enhanced = preprocess_frame(frame)
-    frame_resized = cv2.resize(frame_enhanced, (640, 640))
+    draw = (not HEADLESS or preview.active) and stream.valid(pkt["ts"])  # skip drawing on a recycled slot
+    if draw:
+        with metrics.time("annotation"):
+            if tracker is not None and not stale:
+                draw_tracks(frame, tracks, model.names)
+            else:
+                draw_detections(frame, hits, model.names)
+            if stale:
+                cv2.putText(frame, "STREAM LOST - reconnecting", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
     
-    results = model(frame_resized, verbose=False, device='cpu')  # Ensure it runs on CPU without excessive load
+    with metrics.time("actuation"):
+        actuator.set(detection_found and not stale)  # LED and Buzzer follow detections (confirmed tracks with TRACKING) without blocking this loop
     
-    detection_found = False
+    key = -1
+    with metrics.time("display"):
+        if not HEADLESS:
+            cv2.imshow("YOLOv8 Detection - Dahua", frame)
+            key = cv2.waitKey(1) & 0xFF
+        elif draw:
+            preview.submit(frame)  # encoded on the preview thread, dropped if it is busy
+    if not stale:
+        startup.mark("first detection")  # no-op after the first frame
+        metrics.observe("end_to_end", time.monotonic() - pkt["ts"])  # decode -> displayed
+        scheduler.done(pkt["ts"])
     
-    for result in results:
-        for box in result.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])  
-            confidence = float(box.conf[0])  
-            
-            if confidence >= CONFIDENCE_THRESHOLD: 
-                class_id = int(box.cls[0])  
-                label = f"{model.names[class_id]} {confidence:.2f}"  
-                
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                
-                detection_found = True
-    
-    if detection_found:
-        print("⚡ Object detected! Activating LED and Buzzer ⚡")
-        control_led(True)
-        control_buzzer(True)
-    else:
-        print("❌ No detection. Turning off LED and Buzzer.")
-        control_led(False)
-        control_buzzer(False)
-    
-    cv2.imshow("YOLOv8 Detection - Dahua", frame)
-    
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    if key == ord('q'):
         break
 
-cap.release()
+pipeline.stop()
+print(f"Pipeline stats: {pipeline.stats()}")
+print(f"Startup: {startup.stats()}")
+metrics.close()
+print(f"Metrics: {metrics.to_json()}")
+stream.stop()
+print(f"Capture stats: {stream.stats()}")
+if capture_proc is not None:
+    capture_proc.close()  # ends the capture process, unlinks the ring
+print(f"Scheduler stats: {scheduler.stats()}")
+if gate is not None:
+    print(f"Motion gate stats: {gate.stats()}")
+if tiler is not None:
+    print(f"Tiling stats: {tiler.stats()}")
+if tracker is not None:
+    print(f"Tracker stats: {tracker.stats()}")
+if dual is not None:
+    dual.close()
+    print(f"Dual stream stats: {dual.stats()}")
+if preview is not None:
+    preview.close()
+    print(f"Preview stats: {preview.stats()}")
 cv2.destroyAllWindows()
-ser.close()
-
+actuator.close()
+print(f"Actuator stats: {actuator.stats()}")
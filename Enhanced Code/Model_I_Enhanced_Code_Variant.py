@@ -1,155 +1,291 @@
-import serial
+import threading
 import time
 import cv2
-import torch
 import numpy as np
+from frame_reader import LatestFrameReader, StreamSupervisor, open_http_capture
+from shm_ring import ShmFrameReader
+from preprocessing import FramePreprocessor
+from letterbox import Letterbox
+from actuator import SerialActuator
+from detection_log import DetectionRecorder
+from pipeline import Pipeline, Stage
+from metrics import Metrics
+from motion import MotionGate
+from scheduler import FrameScheduler
+from preview import PreviewServer
+from tiling import TiledDetector
+from dual_stream import DualStreamDetector
+from tracker import Tracker, track_labels
+from model_cache import StartupTimer, cache_path, warm_up
+from postprocess import as_records, boxes, labels, select
+from detectors import OnnxRuntimeDetector, YoloV5Detector
 from models.common import DetectMultiBackend
-from utils.general import non_max_suppression, scale_boxes
 from utils.torch_utils import select_device
 from utils.plots import Annotator
 
+startup = StartupTimer()  # prints time-to-model, warm-up and first detection since launch
+
 # Dahua Camera Configuration
 DAHUA_IP = "192.168.188.37"  # Updated camera IP
 USERNAME = "admin"  # Camera username
 PASSWORD = "ganesh762"  # Camera password
 http_url = f"http://{USERNAME}:{PASSWORD}@{DAHUA_IP}/cgi-bin/mjpg/video.cgi?channel=1&subtype=1"  # Use subtype=1 for smoother stream
 
+# Tiled inference for small, distant animals: read the main stream (subtype=0)
+# and run overlapping 640x640 tiles at native resolution instead of one squeezed frame
+TILED = False
+if TILED:
+    http_url = http_url.replace("subtype=1", "subtype=0")
+
+# Dual stream: the motion gate keeps watching the cheap sub-stream and only the
+# moving regions, cut from the main stream (subtype=0), go to YOLO. The main
+# stream is opened on motion and closed after 10 quiet seconds, so decoding and
+# inference scale with activity (needs MOTION_GATE; leave TILED off)
+DUAL_STREAM = False
+main_url = http_url.replace("subtype=1", "subtype=0")
+
+# MULTIPROCESS decodes in a separate capture process that writes frames into a
+# shared-memory ring, so decoding no longer competes with inference for the GIL.
+# The process is forked here, before the model and any thread exist (forking a
+# multithreaded process can deadlock OpenMP/OpenCV thread pools); reconnects
+# only reopen the stream inside it
+MULTIPROCESS = False
+capture_proc = ShmFrameReader(http_url, fps=10, width=640, height=480).launch() if MULTIPROCESS else None
+
 # Select device ('cpu' for CPU, 'cuda' for GPU if available)
 device = select_device('cpu')  
 
 # Path to trained YOLOv5 ONNX model
 weights_path = "/home/lain/yolov5/runs_final/YOLO5_1M/weights/best.onnx"
 
+# Inference backend: "onnxruntime" runs best.onnx on a tuned ORT CPU session with
+# I/O binding and NumPy NMS (no torch per frame); "yolov5" uses DetectMultiBackend.
+# Compare both with: python3 benchmark_onnx.py --weights best.onnx --images ../Dataset/val/images
+BACKEND = "onnxruntime"
+ORT_THREADS = 0  # intra-op threads; 0 = one per physical core
+# Fast start: ORT's optimised graph is cached in ~/.cache/nilbye keyed by the
+# weights' SHA-256, so later launches (after every solar power cycle) skip optimisation
+FAST_START = True
+
+# Serial communication with Arduino (writer thread; sends only when the LED/buzzer state changes)
+actuator = SerialActuator('/dev/ttyACM0', 9600, min_on=2.0)  # Adjust port if necessary
+
+# Instrumentation: rolling p50/p95/p99 per stage, rewritten to metrics.json every 10 s
+metrics = Metrics()
+metrics.start_dump("metrics.json", interval=10.0, echo=True)
+METRICS_PORT = None  # e.g. 8765 to also serve http://127.0.0.1:8765/metrics
+if METRICS_PORT:
+    metrics.serve(METRICS_PORT)
+
 # Model loading
-model = DetectMultiBackend(weights_path, device=device)
+if BACKEND == "onnxruntime":
+    detector = OnnxRuntimeDetector(weights_path, intra_op_threads=ORT_THREADS, metrics=metrics,
+                                   optimized_path=cache_path(weights_path, "ort.onnx") if FAST_START else None)
+else:
+    model = DetectMultiBackend(weights_path, device=device)
+    detector = YoloV5Detector(model, device, metrics=metrics)
+names = detector.names if BACKEND == "onnxruntime" else model.names
+startup.mark("model loaded")
+warm_up(detector, (640, 640))  # first-inference allocations happen now, not on the first camera frame
+startup.mark("warm-up done")
 
-# Serial communication with Arduino
-ser = serial.Serial('/dev/ttyACM0', 9600, timeout=1)  # Adjust port if necessary
+# Camera Initialization (background reader keeps only the newest frame)
+if capture_proc is not None:
+    reader = capture_proc
+else:
+    reader = LatestFrameReader(lambda: open_http_capture(http_url, fps=10, width=640, height=480), metrics=metrics)
 
-# Camera Initialization
-cap = cv2.VideoCapture(http_url)  # Use HTTP instead of RTSP
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer size for lower latency
-cap.set(cv2.CAP_PROP_FPS, 10)  # Lower FPS to prevent lag
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)  # Reduce resolution for stability
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+# Stream watchdog: when no frame arrived for MAX_TIMEOUT seconds the reader is
+# reconnected in the background (jittered exponential backoff); meanwhile the
+# last frame is served marked stale and the LED/buzzer is forced off
+MAX_TIMEOUT = 5
+stream = StreamSupervisor(reader, stall_timeout=MAX_TIMEOUT, on_down=lambda: actuator.set(False))
 
-if not cap.isOpened():
-    print("Error: Cannot open HTTP stream.")
-    exit()
+if not stream.start():
+    print("Error: Cannot open HTTP stream. Retrying in the background...")
 else:
     print("HTTP Stream is working with subtype=1!")
     
-# Logging setup
-log_file = "detection_log.txt"
-
-def preprocess_frame(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    filtered = cv2.bilateralFilter(frame, 5, 50, 50) 
-    lab = cv2.cvtColor(filtered, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(6, 6))  
-    l = clahe.apply(l)
-    lab = cv2.merge((l, a, b))
-    enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
-
-    sharpen_kernel = np.array([[0, -0.5, 0],
-                               [-0.5, 3, -0.5],
-                               [0, -0.5, 0]]) 
-    
-    sharpened = cv2.filter2D(enhanced, -1, sharpen_kernel)
-    gamma = 1.1  
-    inv_gamma = 1.0 / gamma
-    table = np.array([(i / 255.0) ** inv_gamma * 255 for i in np.arange(0, 256)]).astype("uint8")
-    corrected = cv2.LUT(sharpened, table)
-    
-    return corrected
-
-def log_detection(label, conf, xyxy):
-    """ Log detection details to a file """
-    with open(log_file, "a") as f:
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        f.write(f"{timestamp}, {label}, {conf:.2f}, {xyxy}\n")
-
-def control_led(state):
-    if ser.is_open:
-        command = b'1' if state else b'0'
-        ser.write(command)
-        print(f"🟢 LED {'ON' if state else 'OFF'} sent to Arduino ({command})")
-    else:
-        print("⚠️ Error: Serial port is not open!")
+# Logging setup (buffered binary log, rotated hourly; convert with detection_log.py)
+recorder = DetectionRecorder("detection_logs", names=names)
 
-def control_buzzer(state):
-    if ser.is_open:
-        command = b'1' if state else b'0'
-        ser.write(command)
-        print(f"🔊 Buzzer {'ON' if state else 'OFF'} sent to Arduino ({command})")
-    else:
-        print("⚠️ Error: Serial port is not open!")
+letterbox = Letterbox((640, 640))  # Keeps aspect ratio; scale/padding cached for the stream geometry
+preprocessor = FramePreprocessor(letterbox=letterbox)  # CLAHE/kernel/LUT built once, filters run at inference size
 
-previous_detection_led = False
-previous_detection_buzzer = False
 CONFIDENCE_THRESHOLD = 0.50  # Lower confidence threshold to detect more objects
+VERBOSE = False  # print every frame's raw detections (debugging only: stdout I/O on the hot path)
+
+# Pipeline: capture, preprocessing and inference run on worker threads;
+# annotation, actuation and display stay on the main thread
+INFER_WORKERS = 1  # >1 overlaps inference of consecutive frames on multi-core CPUs
+
+# Motion gating: skip preprocessing and YOLO while the field is static, forcing
+# a refresh every few seconds so animals standing still are not missed (boxes
+# of the last inference are reused for up to `refresh` seconds meanwhile)
+MOTION_GATE = False
+gate = MotionGate(method="diff", hold=2.0, refresh=5.0) if MOTION_GATE else None
+last_det = np.zeros((0, 6), dtype=np.float32)  # boxes from the newest inferred frame
+last_det_ts = 0.0  # its frame time
+last_det_lock = threading.Lock()  # infer workers (INFER_WORKERS > 1) finish out of order
+tiler = TiledDetector(detector, tile=640, overlap=0.2) if TILED else None
+dual = None
+if DUAL_STREAM and gate is not None:
+    dual = DualStreamDetector(lambda: open_http_capture(main_url, fps=10, width=1920, height=1080), detector, idle=10.0)
 
-# Watchdog Timer for Stream Restart
-last_frame_time = time.time()
-MAX_TIMEOUT = 5  # Restart stream if no frames in 5 sec
+# Tracking: animals keep their identity across frames and coast on a Kalman
+# prediction through frames not run through YOLO. The deterrent follows
+# confirmed tracks (3 matches), so one false positive never fires it and the
+# motion gate / scheduler can skip inference without the buzzer flickering.
+# Off by default: waiting for 3 matches delays the alert by two processed
+# frames (seconds when the scheduler skips heavily) vs. the per-frame trigger
+TRACKING = False
+tracker = Tracker(high=CONFIDENCE_THRESHOLD, min_hits=3, max_age=6.0) if TRACKING else None
+
+# Adaptive frame skipping: drop more frames while decode -> display latency is
+# above the target, fewer once it recovers (skip rate is printed every 10 s)
+TARGET_LATENCY = 0.25  # seconds
+scheduler = FrameScheduler(target_latency=TARGET_LATENCY)
+
+# Headless mode (field device): no cv2 window; boxes are only drawn while a
+# browser is connected to the MJPEG preview at http://<device>:PREVIEW_PORT/
+HEADLESS = False
+PREVIEW_PORT = 8080
+preview = PreviewServer(PREVIEW_PORT, fps=5) if HEADLESS else None
+
+def capture():
+    ret, frame, ts, stale = stream.read(timeout=0.5)  # Newest frame only; stale ones are dropped by the reader
+    if ret and stale:
+        return {"frame": frame, "ts": ts, "stale": True, "infer": False}  # stream down: last good frame
+    if not ret or not scheduler.offer(ts):
+        return None
+    return {"frame": frame, "ts": ts}
+
+def motion(pkt):
+    if pkt.get("stale"):
+        return pkt
+    pkt["infer"] = gate(pkt["frame"], pkt["ts"])
+    pkt["regions"] = gate.regions() if gate.moving else None  # tile only where something moved
+    if dual is not None and not gate.moving:
+        dual.poll(pkt["ts"])  # closes the main stream once the field has been quiet for a while
+    return pkt
+
+def preprocess(pkt):
+    if not pkt.get("infer", True):
+        return pkt
+    if dual is not None and pkt.get("regions"):
+        pkt["crops"] = dual.prepare(pkt["frame"], pkt["regions"], pkt["ts"])  # main-stream crops around the motion
+        if pkt["crops"] is not None:
+            return pkt  # crops are copies; the sub frame is not read here
+    if tiler is not None:
+        pkt["tiles"] = tiler.prepare(pkt["frame"], pkt.get("regions"))
+        return pkt if stream.valid(pkt["ts"]) else None
+    pkt["img"] = preprocessor(pkt["frame"]).copy()  # preprocessor reuses its buffer for the next frame
+    if not stream.valid(pkt["ts"]):
+        return None  # shared-memory slot was overwritten while we read it
+    return pkt
+
+def infer(pkt):
+    global last_det, last_det_ts
+    if pkt.get("stale"):
+        pkt["det"] = last_det[:0]  # stream down: no boxes on the frozen frame
+    elif pkt.get("infer", True):
+        if pkt.get("crops") is not None:
+            det = dual.detect(pkt["crops"])  # boxes mapped back to sub-stream pixels
+        elif tiler is not None:
+            det = tiler.detect(pkt["tiles"])  # one batch for all tiles, merged with class-aware NMS
+        else:
+            det = letterbox.to_source(detector(pkt["img"]))  # boxes in camera-frame pixels
+        pkt["det"] = det
+        with last_det_lock:
+            if pkt["ts"] > last_det_ts:  # a slower worker never replaces a newer frame's boxes
+                last_det, last_det_ts = det, pkt["ts"]
+    else:
+        with last_det_lock:
+            pkt["det"] = last_det  # nothing moved: the previous boxes still hold
+    return pkt
+
+stages = [Stage("preprocess", preprocess), Stage("infer", infer, workers=INFER_WORKERS)]
+if gate is not None:
+    stages.insert(0, Stage("motion", motion))
+pipeline = Pipeline(capture, stages, metrics=metrics).start()
 
 while True:
-    for _ in range(2):  # Skip every 2 frames to further reduce lag
-        cap.grab()  # Grab frame but don't decode it
-    
-    ret, frame = cap.read()
+    pkt = pipeline.get(timeout=0.5)
     
-    if not ret or frame is None or frame.size == 0 or (time.time() - last_frame_time > MAX_TIMEOUT):
-        print("Frame error detected! Restarting stream...")
-        cap.release()
-        time.sleep(2)  # Small delay before reconnecting
-        cap = cv2.VideoCapture(http_url)  # Reinitialize HTTP stream
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        cap.set(cv2.CAP_PROP_FPS, 10)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        last_frame_time = time.time()
-        continue  # Skip this iteration
+    if pkt is None:
+        continue  # reconnects are handled by the stream watchdog
     
-    last_frame_time = time.time()  # Update last successful frame time
-    
-    frame_enhanced = preprocess_frame(frame)
-    frame_resized = cv2.resize(frame_enhanced, (640, 640))
-    img = torch.from_numpy(frame_resized).to(device)
-    img = img.permute(2, 0, 1).float() / 255.0  
-    img = img.unsqueeze(0)  
-
-    pred = model(img)
-    pred = non_max_suppression(pred)
+    frame, det = pkt["frame"], pkt["det"]
+    stale = pkt.get("stale", False)
 
-    annotator = Annotator(frame, line_width=2)
-    detection_found = False
-    
-    for det in pred:
+    if VERBOSE:
         print(f"Detections: {det}")  # Debugging: Print detection results
-        if det is not None and len(det):
-            det[:, :4] = scale_boxes(img.shape[2:], det[:, :4], frame.shape).round()
-            for *xyxy, conf, cls in reversed(det):
-                if conf >= CONFIDENCE_THRESHOLD:
-                    label = f"{model.names[int(cls)]} {conf:.2f}"
+    with metrics.time("postprocess"):
+        hits = select(as_records(det), CONFIDENCE_THRESHOLD)  # one vector mask for the whole frame
+    detection_found = len(hits) > 0
+    if tracker is not None and not stale:
+        with metrics.time("tracking"):
+            if pkt.get("infer", True):
+                tracks = tracker.update(det, pkt["ts"])  # low-confidence boxes only extend existing tracks
+            else:
+                tracks = tracker.predict(pkt["ts"])  # no inference on this frame: coast
+        detection_found = tracker.alert()
+    if pkt.get("infer", True):  # held-over boxes were already logged
+        recorder.record(hits)  # whole frame in one call
+    draw = (not HEADLESS or preview.active) and stream.valid(pkt["ts"])  # skip drawing on a recycled slot
+    annotator = Annotator(frame, line_width=2) if draw else None
+    if draw:
+        with metrics.time("annotation"):
+            if tracker is not None and not stale:
+                for xyxy, label in zip(tracks[::-1, :4].astype(int).tolist(), track_labels(tracks[::-1], names)):
+                    annotator.box_label(xyxy, label)
+            else:
+                for xyxy, label in zip(boxes(hits[::-1]).tolist(), labels(hits[::-1], names)):
                     annotator.box_label(xyxy, label)
-                    detection_found = True
-                    log_detection(label, conf, xyxy)
+            if stale:
+                cv2.putText(frame, "STREAM LOST - reconnecting", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
     
-    if detection_found:
-        print("⚡ Object detected! Activating LED and Buzzer ⚡")
-        control_led(True)
-        control_buzzer(True)
-    else:
-        print("❌ No detection. Turning off LED and Buzzer.")
-        control_led(False)
-        control_buzzer(False)
+    with metrics.time("actuation"):
+        actuator.set(detection_found and not stale)  # LED and Buzzer follow detections (confirmed tracks with TRACKING) without blocking this loop
     
-    cv2.imshow("Dahua HTTP Stream - Detections", annotator.result())
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    key = -1
+    with metrics.time("display"):
+        if not HEADLESS:
+            cv2.imshow("Dahua HTTP Stream - Detections", annotator.result() if draw else frame)
+            key = cv2.waitKey(1) & 0xFF
+        elif draw:
+            preview.submit(annotator.result())  # encoded on the preview thread, dropped if it is busy
+    if not stale:
+        startup.mark("first detection")  # no-op after the first frame
+        metrics.observe("end_to_end", time.monotonic() - pkt["ts"])  # decode -> displayed
+        scheduler.done(pkt["ts"])
+    if key == ord('q'):
         break
 
-cap.release()
+pipeline.stop()
+print(f"Pipeline stats: {pipeline.stats()}")
+print(f"Startup: {startup.stats()}")
+metrics.close()
+print(f"Metrics: {metrics.to_json()}")
+stream.stop()
+print(f"Capture stats: {stream.stats()}")
+if capture_proc is not None:
+    capture_proc.close()  # ends the capture process, unlinks the ring
+print(f"Scheduler stats: {scheduler.stats()}")
+if gate is not None:
+    print(f"Motion gate stats: {gate.stats()}")
+if tiler is not None:
+    print(f"Tiling stats: {tiler.stats()}")
+if tracker is not None:
+    print(f"Tracker stats: {tracker.stats()}")
+if dual is not None:
+    dual.close()
+    print(f"Dual stream stats: {dual.stats()}")
+if preview is not None:
+    preview.close()
+    print(f"Preview stats: {preview.stats()}")
 cv2.destroyAllWindows()
-ser.close()
+actuator.close()
+print(f"Actuator stats: {actuator.stats()}")
+recorder.close()
+print(f"Log stats: {recorder.stats()}")
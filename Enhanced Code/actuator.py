@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# Change-only serial driver for the Arduino LED/buzzer.
+# Run this file directly to exercise it against a pseudo-terminal (no hardware):
+#   python3 actuator.py
+
+import queue, threading, time
+
+
+class SerialActuator:
+    """LED/buzzer on the Arduino serial port, driven from its own writer thread.
+
+    The detection loop calls :meth:`set` every frame; that only records the
+    wanted state and returns immediately. The writer thread sends a byte only
+    when the output actually has to change, and applies two timing rules:
+
+    * ``min_on``   -- once switched on, stay on at least this many seconds
+    * ``cooldown`` -- once switched off, stay off at least this many seconds
+
+    so a detection that flickers between frames does not flicker the
+    deterrent. A failed write is retried every ``retry`` seconds until it
+    succeeds or the wanted state changes, so a transient serial error never
+    leaves the buzzer on. The LED and buzzer share one command byte on the
+    Arduino sketch, so they are a single output here.
+    """
+
+    def __init__(self, port="/dev/ttyACM0", baudrate=9600, min_on=2.0, cooldown=0.0,
+                 on_cmd=b'1', off_cmd=b'0', retry=0.5, verbose=True):
+        # port: device path, or an already-open serial.Serial-like object
+        if isinstance(port, str):
+            import serial
+            port = serial.Serial(port, baudrate, timeout=1)
+        self.ser = port
+        self.min_on = min_on
+        self.cooldown = cooldown
+        self.on_cmd = on_cmd
+        self.off_cmd = off_cmd
+        self.retry = retry
+        self.verbose = verbose
+
+        self._requests = queue.Queue()
+        self._wanted = False
+        self._state = None  # unknown until the first write
+        self._changed_at = 0.0
+        self._running = True
+
+        # Counters
+        self.requests = 0  # set() calls that changed the wanted state
+        self.writes = 0
+        self.write_errors = 0
+        self.latency_total = 0.0  # request (or end of hold) -> write, seconds
+        self.latency_max = 0.0
+
+        self._thread = threading.Thread(target=self._writer, name="actuator", daemon=True)
+        self._thread.start()
+
+    # ---------------- detection-loop API ----------------
+    def set(self, state):
+        """Request the output on/off. Cheap: only transitions reach the writer thread."""
+        state = bool(state)
+        if state != self._wanted:
+            self._wanted = state
+            self.requests += 1
+            self._requests.put((state, time.monotonic()))
+
+    def close(self, timeout=1.0):
+        """Switch the output off, stop the writer thread and close the port."""
+        self.set(False)
+        self._running = False
+        self._requests.put(None)
+        self._thread.join(timeout=timeout)
+        if self._state:
+            self._write(False, time.monotonic())  # fail safe, ignoring min_on
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+
+    @property
+    def state(self):
+        return bool(self._state)
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "requests": self.requests,
+            "writes": self.writes,
+            "write_errors": self.write_errors,
+            "latency_ms_avg": 1000.0 * self.latency_total / max(1, self.writes),
+            "latency_ms_max": 1000.0 * self.latency_max,
+        }
+
+    # ---------------- writer thread ----------------
+    def _hold_until(self, wanted):
+        """Monotonic time before which the output may not switch to ``wanted``."""
+        if self._state is None:
+            return 0.0
+        if self._state and not wanted:
+            return self._changed_at + self.min_on
+        if not self._state and wanted:
+            return self._changed_at + self.cooldown
+        return 0.0
+
+    def _writer(self):
+        pending = None  # (state, requested_at) waiting for min_on / cooldown to pass, or for a retry
+        retry_at = 0.0
+        while self._running:
+            timeout = None
+            if pending is not None:
+                timeout = max(0.0, self._hold_until(pending[0]) - time.monotonic(), retry_at - time.monotonic())
+            try:
+                item = self._requests.get(timeout=timeout)
+                if item is None:
+                    break
+                pending = item
+                retry_at = 0.0  # a new request is tried at once
+            except queue.Empty:
+                pass  # hold time for the pending request has passed
+
+            if pending is None:
+                continue
+            wanted, requested_at = pending
+            if wanted == self._state:
+                pending = None  # e.g. on -> off -> on inside min_on: nothing to send
+            else:
+                hold = self._hold_until(wanted)
+                if time.monotonic() >= max(hold, retry_at):
+                    if self._write(wanted, max(requested_at, hold)):  # latency excludes the deliberate hold
+                        pending = None
+                    else:
+                        retry_at = time.monotonic() + self.retry  # keep it: set() will not ask again
+
+    def _write(self, state, requested_at):
+        """Send the command for ``state``; ``False`` if the port rejected it."""
+        command = self.on_cmd if state else self.off_cmd
+        try:
+            if not self.ser.is_open:
+                raise IOError("serial port is not open")
+            self.ser.write(command)
+        except Exception as e:
+            self.write_errors += 1
+            print(f"⚠️ Error: could not write to Arduino: {e}")
+            return False
+        now = time.monotonic()
+        self._state = state
+        self._changed_at = now
+        self.writes += 1
+        latency = now - requested_at
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        if self.verbose:
+            print(f"{'🟢' if state else '⚫'} LED/Buzzer {'ON' if state else 'OFF'} sent to Arduino ({command})")
+        return True
+
+
+def _pty_demo():
+    """Drive the actuator with flickering detections and show what reaches the 'Arduino'."""
+    import os, serial
+
+    master, slave = os.openpty()
+    port = serial.Serial(os.ttyname(slave), 9600, timeout=0)
+    act = SerialActuator(port, min_on=0.5, cooldown=0.2)
+
+    pattern = [1, 0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 0]  # one entry per 50 ms frame
+    for detected in pattern * 2:
+        act.set(detected)
+        time.sleep(0.05)
+    time.sleep(0.6)
+    act.close()
+
+    os.set_blocking(master, False)
+    try:
+        received = os.read(master, 1024)
+    except BlockingIOError:
+        received = b""
+    print(f"frames: {len(pattern) * 2}, bytes on the wire: {received!r}")
+    print(f"stats: {act.stats()}")
+
+
+if __name__ == "__main__":
+    _pty_demo()
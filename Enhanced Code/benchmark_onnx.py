@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# Frames/sec of best.onnx through DetectMultiBackend (torch pre/post-processing)
+# vs OnnxRuntimeDetector (tuned ORT session, I/O binding, NumPy NMS), and how
+# closely their detections agree. Run from the yolov5 repo or with it on sys.path:
+#   python3 benchmark_onnx.py --weights best.onnx --threads 0 2 4
+
+import argparse, glob, os, time
+import cv2
+import numpy as np
+from letterbox import Letterbox
+from preprocessing import FramePreprocessor
+from detectors import OnnxRuntimeDetector, YoloV5Detector
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+p = argparse.ArgumentParser("ONNX Runtime vs DetectMultiBackend benchmark")
+p.add_argument("--weights", required=True, help="YOLOv5 best.onnx")
+p.add_argument("--images", default=os.path.join(ROOT, "..", "Dataset", "val", "images"),
+               help="Directory of test images")
+p.add_argument("--limit", type=int, default=50, help="Max images to load")
+p.add_argument("--repeat", type=int, default=3, help="Passes over the image set per backend")
+p.add_argument("--size", type=int, default=640, help="Inference resolution (square)")
+p.add_argument("--threads", type=int, nargs="+", default=[0], help="ORT intra-op thread counts to try")
+p.add_argument("--conf", type=float, default=0.25, help="Detector confidence threshold")
+args = p.parse_args()
+
+
+def load_images():
+    paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")))[:args.limit]
+    pre = FramePreprocessor(letterbox=Letterbox((args.size, args.size)))
+    imgs = [pre(f).copy() for f in map(cv2.imread, paths) if f is not None]
+    if not imgs:
+        raise SystemExit(f"No images found in {args.images}")
+    return imgs
+
+
+def bench(name, detector, imgs):
+    detector(imgs[0])  # warm-up (allocates buffers, builds kernels)
+    n = 0
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for img in imgs:
+            detector(img)
+            n += 1
+    dt = time.perf_counter() - t0
+    print(f"{name:<28} {n / dt:8.1f} FPS  ({dt * 1000.0 / n:.2f} ms/frame)")
+    return n / dt
+
+
+def box_iou(a, b):
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area = lambda d: (d[:, 2] - d[:, 0]) * (d[:, 3] - d[:, 1])
+    return inter / (area(a)[:, None] + area(b)[None, :] - inter + 1e-9)
+
+
+def agreement(ref, test):
+    """Fraction of reference boxes matched by a same-class box with IoU >= 0.9."""
+    matched = total = 0
+    for a, b in zip(ref, test):
+        total += len(a)
+        if len(a) and len(b):
+            iou = box_iou(a, b) * (a[:, None, 5] == b[None, :, 5])
+            matched += int((iou.max(1) >= 0.9).sum())
+    return matched / max(1, total)
+
+
+def main():
+    from models.common import DetectMultiBackend  # yolov5 repo on sys.path
+    from utils.torch_utils import select_device
+
+    imgs = load_images()
+    print(f"{len(imgs)} images from {args.images} at {args.size}x{args.size}")
+
+    device = select_device("cpu")
+    torch_det = YoloV5Detector(DetectMultiBackend(args.weights, device=device), device, conf=args.conf)
+    base_fps = bench("DetectMultiBackend", torch_det, imgs)
+    ref = [torch_det(img) for img in imgs]
+
+    for threads in args.threads:
+        ort_det = OnnxRuntimeDetector(args.weights, conf=args.conf, intra_op_threads=threads)
+        fps = bench(f"onnxruntime (threads={threads})", ort_det, imgs)
+        test = [ort_det(img) for img in imgs]
+        print(f"  speed-up x{fps / base_fps:.2f}, boxes {sum(map(len, test))} vs {sum(map(len, ref))}, "
+              f"agreement {100.0 * agreement(ref, test):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
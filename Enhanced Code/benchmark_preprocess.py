@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# Frames/sec of the old preprocess_frame + cv2.resize path vs FramePreprocessor,
+# plus the pixel difference between their outputs.
+
+import argparse, glob, os, time
+import cv2
+import numpy as np
+from preprocessing import FramePreprocessor, preprocess_frame
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+p = argparse.ArgumentParser("Preprocessing benchmark")
+p.add_argument("--images", default=os.path.join(ROOT, "..", "Dataset", "val", "images"),
+               help="Directory of test images")
+p.add_argument("--limit", type=int, default=50, help="Max images to load")
+p.add_argument("--repeat", type=int, default=3, help="Passes over the image set per variant")
+p.add_argument("--size", type=int, default=640, help="Inference resolution (square)")
+args = p.parse_args()
+
+
+def load_frames():
+    paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")))[:args.limit]
+    frames = [cv2.imread(f) for f in paths]
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        raise SystemExit(f"No images found in {args.images}")
+    return frames
+
+
+def bench(name, fn, frames):
+    fn(frames[0])  # warm-up (allocates buffers)
+    n = 0
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for f in frames:
+            fn(f)
+            n += 1
+    dt = time.perf_counter() - t0
+    print(f"{name:<28} {n / dt:8.1f} FPS  ({dt * 1000.0 / n:.2f} ms/frame)")
+    return n / dt
+
+
+def main():
+    frames = load_frames()
+    size = (args.size, args.size)
+    print(f"{len(frames)} frames from {args.images}, first {frames[0].shape[1]}x{frames[0].shape[0]}, target {size}")
+
+    legacy = lambda f: cv2.resize(preprocess_frame(f), size)
+    exact = FramePreprocessor(size=size, resize_first=False)
+    fast = FramePreprocessor(size=size, resize_first=True)
+
+    base_fps = bench("preprocess_frame + resize", legacy, frames)
+    exact_fps = bench("FramePreprocessor (exact)", exact, frames)
+    fast_fps = bench("FramePreprocessor (fast)", fast, frames)
+    print(f"speed-up: exact x{exact_fps / base_fps:.2f}, fast x{fast_fps / base_fps:.2f}")
+
+    max_exact, mean_fast = 0, 0.0
+    for f in frames:
+        ref = legacy(f).astype(np.int16)
+        max_exact = max(max_exact, int(np.abs(exact(f).astype(np.int16) - ref).max()))
+        mean_fast += float(np.abs(fast(f).astype(np.int16) - ref).mean())
+    print(f"exact: max abs diff {max_exact}; fast: mean abs diff {mean_fast / len(frames):.2f} (0-255)")
+
+    print("per-stage ms (fast):", {k: round(v, 2) for k, v in fast.timings().items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# Buffered, rotating binary detection log + CSV export.
+#
+# File layout (little-endian):
+#   b"NDL1" | u32 header_len | header JSON ({"names": [...], "created": ts})
+#   then blocks of: u32 record_count | record_count * RECORD_DTYPE
+#
+# Convert back to CSV:
+#   python3 detection_log.py detection_logs/detections-*.bin -o detections.csv
+
+import argparse, csv, glob, json, os, struct, sys, threading, time
+import numpy as np
+from postprocess import as_array
+
+MAGIC = b"NDL1"
+RECORD_DTYPE = np.dtype([
+    ("ts", "<f8"),  # unix time of the frame
+    ("camera", "<u2"),
+    ("cls", "<u2"),
+    ("conf", "<f4"),
+    ("x1", "<f4"), ("y1", "<f4"), ("x2", "<f4"), ("y2", "<f4"),
+])
+
+
+class DetectionRecorder:
+    """Asynchronous detection log: the hot path only appends arrays to a list.
+
+    ``record()`` takes the whole (N, 6) ``[x1, y1, x2, y2, conf, cls]`` array of
+    a frame, so its cost does not depend on how many animals are in view. A
+    writer thread turns the pending arrays into one structured block and
+    appends it to the current file when ``flush_records`` rows are pending or
+    ``flush_interval`` seconds have passed. A new file is started every
+    ``rotate_every`` seconds and files older than ``retention`` seconds are
+    deleted.
+    """
+
+    def __init__(self, directory="detection_logs", names=None, prefix="detections",
+                 flush_records=1024, flush_interval=2.0,
+                 rotate_every=3600, retention=14 * 24 * 3600):
+        self.directory = directory
+        self.names = list(names.values()) if isinstance(names, dict) else list(names or [])
+        self.prefix = prefix
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.rotate_every = rotate_every
+        self.retention = retention
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending = []  # (ts, camera, det) tuples
+        self._pending_rows = 0
+        self._cond = threading.Condition()
+        self._file = None
+        self._file_period = None
+        self.path = None
+
+        # Counters
+        self.records = 0
+        self.blocks = 0
+        self.bytes_written = 0
+        self.files_deleted = 0
+
+        self._running = True
+        self._thread = threading.Thread(target=self._writer, name="detection-log", daemon=True)
+        self._thread.start()
+
+    # ---------------- hot path ----------------
+    def record(self, det, ts=None, camera=0):
+        """Queue one frame's detections (rows ``[x1, y1, x2, y2, conf, cls]`` or a
+        ``postprocess.DETECTION_DTYPE`` record array).
+
+        The array is not copied; do not modify it afterwards.
+        """
+        if det is None or not len(det):
+            return
+        if det.dtype.names:
+            det = as_array(det)
+        with self._cond:
+            self._pending.append((time.time() if ts is None else ts, camera, det))
+            self._pending_rows += len(det)
+            if self._pending_rows >= self.flush_records:
+                self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=5.0)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        return {"records": self.records, "blocks": self.blocks, "bytes": self.bytes_written,
+                "pending": self._pending_rows, "file": self.path, "files_deleted": self.files_deleted}
+
+    # ---------------- writer thread ----------------
+    def _writer(self):
+        while True:
+            with self._cond:
+                if self._running and self._pending_rows < self.flush_records:
+                    self._cond.wait(timeout=self.flush_interval)
+                batch, self._pending, self._pending_rows = self._pending, [], 0
+                running = self._running
+            if batch:
+                try:
+                    self._write_block(batch)
+                except OSError as e:
+                    print(f"[LOG] write failed: {e}")
+            if not running:
+                break
+
+    def _write_block(self, batch):
+        counts = np.array([len(d) for _, _, d in batch])
+        det = np.concatenate([np.asarray(d, dtype=np.float32)[:, :6] for _, _, d in batch])
+        rec = np.empty(len(det), dtype=RECORD_DTYPE)
+        rec["ts"] = np.repeat([ts for ts, _, _ in batch], counts)
+        rec["camera"] = np.repeat([cam for _, cam, _ in batch], counts)
+        rec["x1"], rec["y1"], rec["x2"], rec["y2"] = det[:, 0], det[:, 1], det[:, 2], det[:, 3]
+        rec["conf"] = det[:, 4]
+        rec["cls"] = det[:, 5]
+
+        f = self._current_file(batch[0][0])
+        data = rec.tobytes()
+        f.write(struct.pack("<I", len(rec)))
+        f.write(data)
+        f.flush()
+        self.records += len(rec)
+        self.blocks += 1
+        self.bytes_written += 4 + len(data)
+
+    def _current_file(self, ts):
+        period = int(ts // self.rotate_every)
+        if self._file is not None and period == self._file_period:
+            return self._file
+        if self._file is not None:
+            self._file.close()
+        start = time.strftime("%Y%m%d-%H%M%S", time.localtime(period * self.rotate_every))
+        self.path = os.path.join(self.directory, f"{self.prefix}-{start}.bin")
+        new = not os.path.exists(self.path)
+        self._file = open(self.path, "ab")
+        self._file_period = period
+        if new:
+            header = json.dumps({"names": self.names, "created": ts}).encode()
+            self._file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        self._prune()
+        return self._file
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for path in glob.glob(os.path.join(self.directory, f"{self.prefix}-*.bin")):
+            if path != self.path and os.path.getmtime(path) < cutoff:
+                try:
+                    os.remove(path)
+                    self.files_deleted += 1
+                except OSError:
+                    pass
+
+
+# ---------------- reading ----------------
+def read_log(path):
+    """Return ``(header, records)`` for one log file; a truncated last block is ignored."""
+    blocks = []
+    with open(path, "rb") as f:
+        if f.read(4) != MAGIC:
+            raise ValueError(f"{path}: not a detection log")
+        (hlen,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(hlen))
+        while True:
+            raw = f.read(4)
+            if len(raw) < 4:
+                break
+            (n,) = struct.unpack("<I", raw)
+            data = f.read(n * RECORD_DTYPE.itemsize)
+            if len(data) < n * RECORD_DTYPE.itemsize:
+                break
+            blocks.append(np.frombuffer(data, dtype=RECORD_DTYPE))
+    records = np.concatenate(blocks) if blocks else np.empty(0, dtype=RECORD_DTYPE)
+    return header, records
+
+
+def to_csv(paths, out):
+    w = csv.writer(out)
+    w.writerow(["timestamp", "camera", "label", "confidence", "x1", "y1", "x2", "y2"])
+    for path in paths:
+        header, rec = read_log(path)
+        names = header.get("names") or []
+        for r in rec.tolist():
+            ts, cam, cls, conf, x1, y1, x2, y2 = r
+            label = names[cls] if cls < len(names) else str(cls)
+            w.writerow([time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)), cam, label,
+                        f"{conf:.2f}", f"{x1:.0f}", f"{y1:.0f}", f"{x2:.0f}", f"{y2:.0f}"])
+
+
+def main():
+    p = argparse.ArgumentParser("Convert binary detection logs to CSV")
+    p.add_argument("files", nargs="+", help="detections-*.bin files (processed in sorted order)")
+    p.add_argument("-o", "--output", default="-", help="CSV path (default: stdout)")
+    args = p.parse_args()
+    paths = sorted(args.files)
+    if args.output == "-":
+        to_csv(paths, sys.stdout)
+    else:
+        with open(args.output, "w", newline="") as out:
+            to_csv(paths, out)
+
+
+if __name__ == "__main__":
+    main()
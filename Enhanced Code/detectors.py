@@ -0,0 +1,200 @@
+import ast
+import os
+import threading
+import time
+import cv2
+import numpy as np
+
+# All detector wrappers take a preprocessed BGR uint8 image at the inference
+# resolution and return an (N, 6) float32 array of [x1, y1, x2, y2, conf, cls]
+# in that image's pixel coordinates, so the rest of the loop does not care
+# which YOLO family produced the boxes. If a metrics.Metrics is attached, the
+# forward pass is recorded as "inference" and post-processing as "nms".
+# torch is imported lazily, so the ONNX Runtime path starts without it.
+
+
+class UltralyticsDetector:
+    """YOLOv8 model loaded with ``ultralytics.YOLO``."""
+
+    def __init__(self, model, device="cpu", conf=0.25, metrics=None):
+        self.model = model
+        self.device = device
+        self.conf = conf
+        self.metrics = metrics
+        self.names = model.names
+
+    def __call__(self, img):
+        return self.batch([img])[0]
+
+    def batch(self, imgs):
+        """One forward pass over a list of images; returns one (N, 6) array per image."""
+        results = self.model(list(imgs), verbose=False, device=self.device, conf=self.conf)
+        if self.metrics is not None and results:
+            speed = results[0].speed  # ms per image, measured by ultralytics
+            self.metrics.observe("inference", speed["inference"] * len(results) / 1000.0)
+            self.metrics.observe("nms", speed["postprocess"] * len(results) / 1000.0)
+        return [r.boxes.data[:, :6].cpu().numpy().astype(np.float32) for r in results]
+
+
+class YoloV5Detector:
+    """YOLOv5 model loaded with ``models.common.DetectMultiBackend`` (.pt or .onnx)."""
+
+    def __init__(self, model, device, conf=0.25, iou=0.45, max_batch=None, metrics=None):
+        import torch
+        from utils.general import non_max_suppression  # yolov5 repo on sys.path
+
+        self._torch = torch
+        self._nms = non_max_suppression
+        self.model = model
+        self.device = device
+        self.conf = conf
+        self.iou = iou
+        self.metrics = metrics
+        # ONNX models exported without --dynamic only accept batch 1 at the export size
+        self.max_batch = max_batch or (1 if getattr(model, "onnx", False) else 64)
+        session = getattr(model, "session", None)
+        h, w = session.get_inputs()[0].shape[2:] if session is not None else (None, None)
+        self.input_hw = (h, w) if isinstance(h, int) and isinstance(w, int) else None  # None: any size
+        self.names = model.names
+
+    def __call__(self, img):
+        return self.batch([img])[0]
+
+    def batch(self, imgs):
+        """Stack images into NCHW batches of up to ``max_batch``; returns one (N, 6) array per image."""
+        out = []
+        for i in range(0, len(imgs), self.max_batch):
+            chunk = np.stack(imgs[i:i + self.max_batch])
+            im = self._torch.from_numpy(chunk).to(self.device)
+            im = im.permute(0, 3, 1, 2).float() / 255.0
+            t0 = time.perf_counter()
+            raw = self.model(im)
+            t1 = time.perf_counter()
+            pred = self._nms(raw, conf_thres=self.conf, iou_thres=self.iou)
+            if self.metrics is not None:
+                self.metrics.observe("inference", t1 - t0)
+                self.metrics.observe("nms", time.perf_counter() - t1)
+            out += [p.cpu().numpy().astype(np.float32) for p in pred]
+        return out
+
+
+def yolov5_nms(pred, conf=0.25, iou=0.45, max_det=300, max_wh=7680):
+    """NumPy version of yolov5 ``non_max_suppression`` for one image.
+
+    ``pred`` is the raw (anchors, 5 + nc) head output [cx, cy, w, h, obj, cls...];
+    returns (N, 6) [x1, y1, x2, y2, conf, cls]. Classes are kept apart by
+    offsetting boxes per class, and the suppression itself runs in OpenCV.
+    """
+    x = pred[pred[:, 4] > conf]
+    if not len(x):
+        return np.zeros((0, 6), dtype=np.float32)
+    scores = x[:, 5:] * x[:, 4:5]
+    cls = scores.argmax(1)
+    best = scores[np.arange(len(x)), cls]
+    keep = best > conf
+    x, cls, best = x[keep], cls[keep], best[keep]
+    if not len(x):
+        return np.zeros((0, 6), dtype=np.float32)
+
+    boxes = np.empty((len(x), 4), dtype=np.float32)
+    boxes[:, :2] = x[:, :2] - x[:, 2:4] / 2
+    boxes[:, 2:] = x[:, :2] + x[:, 2:4] / 2
+    shifted = x[:, :4].copy()  # NMSBoxes wants [x, y, w, h]
+    shifted[:, :2] = boxes[:, :2] + cls[:, None] * max_wh
+    idx = cv2.dnn.NMSBoxes(shifted.tolist(), best.tolist(), conf, iou, top_k=max_det)
+    idx = np.asarray(idx, dtype=np.int64).reshape(-1)[:max_det]
+    return np.concatenate([boxes[idx], best[idx, None], cls[idx, None]], axis=1).astype(np.float32)
+
+
+class OnnxRuntimeDetector:
+    """YOLOv5 ``best.onnx`` run directly on ONNX Runtime's CPU provider.
+
+    Skips torch entirely on the per-frame path: the image is written into a
+    preallocated NCHW float32 buffer (one per calling thread), bound to the
+    session with I/O binding, and NMS runs in NumPy/OpenCV. Thread counts and
+    graph optimisation level are passed to the session so they can be tuned
+    for the Jetson's CPU cores.
+
+    Channel order follows the current DetectMultiBackend path (the frame goes
+    in as BGR); set ``swap_rb=True`` to feed RGB as yolov5 trains with.
+    """
+
+    def __init__(self, path, conf=0.25, iou=0.45, intra_op_threads=0, inter_op_threads=1,
+                 graph_optimization="all", sequential=True, swap_rb=False, names=None,
+                 optimized_path=None, metrics=None):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = intra_op_threads  # 0 = one per physical core
+        opts.inter_op_num_threads = inter_op_threads
+        opts.graph_optimization_level = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }[graph_optimization]
+        opts.execution_mode = (ort.ExecutionMode.ORT_SEQUENTIAL if sequential
+                               else ort.ExecutionMode.ORT_PARALLEL)
+        # optimized_path caches the graph after ORT's optimisation passes; later
+        # launches load it as-is instead of optimising best.onnx again
+        if optimized_path and os.path.exists(optimized_path):
+            path = optimized_path
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        elif optimized_path:
+            opts.optimized_model_filepath = optimized_path
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.output_name = self.session.get_outputs()[0].name
+        batch, _, h, w = inp.shape
+        self.input_hw = (h if isinstance(h, int) else 640, w if isinstance(w, int) else 640)
+        self.max_batch = batch if isinstance(batch, int) else 64  # static exports accept batch 1 only
+        self.conf = conf
+        self.iou = iou
+        self.swap_rb = swap_rb
+        self.metrics = metrics
+        self.names = names or self._names_from_metadata()
+        self._local = threading.local()
+
+    def _names_from_metadata(self):
+        meta = self.session.get_modelmeta().custom_metadata_map  # yolov5 export stores {"names": "{0: 'cow', ...}"}
+        try:
+            return ast.literal_eval(meta["names"])
+        except (KeyError, ValueError, SyntaxError):
+            return {}
+
+    def _binding(self, n):
+        """Per-thread input buffer + I/O binding for a batch of ``n`` images."""
+        local = self._local
+        if getattr(local, "n", None) != n:
+            h, w = self.input_hw
+            local.buf = np.empty((n, 3, h, w), dtype=np.float32)
+            local.io = self.session.io_binding()
+            local.io.bind_cpu_input(self.input_name, local.buf)
+            local.io.bind_output(self.output_name)
+            local.n = n
+        return local.buf, local.io
+
+    def __call__(self, img):
+        return self.batch([img])[0]
+
+    def batch(self, imgs):
+        out = []
+        for i in range(0, len(imgs), self.max_batch):
+            chunk = imgs[i:i + self.max_batch]
+            buf, io = self._binding(len(chunk))
+            for j, img in enumerate(chunk):
+                chw = img.transpose(2, 0, 1)
+                if self.swap_rb:
+                    chw = chw[::-1]
+                np.multiply(chw, 1.0 / 255.0, out=buf[j], casting="unsafe")
+            t0 = time.perf_counter()
+            self.session.run_with_iobinding(io)
+            pred = io.copy_outputs_to_cpu()[0]
+            t1 = time.perf_counter()
+            out += [yolov5_nms(p, self.conf, self.iou) for p in pred]
+            if self.metrics is not None:
+                self.metrics.observe("inference", t1 - t0)
+                self.metrics.observe("nms", time.perf_counter() - t1)
+        return out
@@ -0,0 +1,205 @@
+import threading
+import time
+import numpy as np
+from frame_reader import LatestFrameReader
+from letterbox import Letterbox
+from preprocessing import FramePreprocessor
+from tiling import merge_nms
+
+
+def crop_windows(regions, scale, shape, min_crop=320, pad=0.25, max_crops=4):
+    """Main-stream crops (N, 4) int ``[x1, y1, x2, y2]`` covering sub-stream ``regions``.
+
+    Each region is scaled by ``scale`` (main / sub pixels), grown by ``pad``
+    of its size on every side and to at least ``min_crop`` pixels, moved inside
+    ``shape`` (h, w) and merged with any crop it overlaps. More than
+    ``max_crops`` crops collapse into their common bounding box.
+    """
+    h, w = shape[:2]
+    if not len(regions):
+        return np.zeros((0, 4), dtype=np.int32)
+    r = np.asarray(regions, dtype=np.float64) * np.tile(scale, 2)
+    size = r[:, 2:] - r[:, :2]
+    grow = np.maximum(size * pad, (min_crop - size) / 2)
+    r[:, :2] -= grow
+    r[:, 2:] += grow
+    r -= np.tile(np.minimum(r[:, :2], 0) + np.maximum(r[:, 2:] - (w, h), 0), 2)  # slide inside, keep the size
+    r = np.clip(r, 0, (w, h, w, h))
+    crops = [row for row in r]
+    merged = True
+    while merged and len(crops) > 1:
+        merged = False
+        for i in range(len(crops)):
+            for j in range(i + 1, len(crops)):
+                a, b = crops[i], crops[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    crops[i] = np.concatenate([np.minimum(a[:2], b[:2]), np.maximum(a[2:], b[2:])])
+                    del crops[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    crops = np.array(crops)
+    if len(crops) > max_crops:
+        crops = np.concatenate([crops[:, :2].min(0), crops[:, 2:].max(0)])[None]
+    return crops.round().astype(np.int32)
+
+
+class OnDemandReader:
+    """A :class:`frame_reader.LatestFrameReader` that only runs while it is wanted.
+
+    :meth:`want` opens the stream (on a background thread, so the caller
+    never blocks on the connect) and :meth:`poll` closes it again once nobody
+    asked for ``idle`` seconds, so a quiet field costs no decoding at all.
+    """
+
+    def __init__(self, open_capture, idle=10.0, name="main-capture", metrics=None):
+        self.reader = LatestFrameReader(open_capture, name=name, metrics=metrics)
+        self.idle = idle
+        self._lock = threading.Lock()
+        self._opening = False
+        self._last_want = 0.0
+        self._opened_at = None
+
+        # Counters
+        self.opens = 0
+        self.open_failures = 0
+        self.active_s = 0.0  # total time the stream was being decoded
+
+    def _open(self):
+        ok = self.reader.start()
+        with self._lock:
+            self._opening = False
+            if ok:
+                self.opens += 1
+                self._opened_at = time.monotonic()
+            else:
+                self.open_failures += 1
+                self.reader.stop()
+
+    def want(self, now=None):
+        """Mark the stream as needed; starts it if it is closed."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._last_want = now
+            if self._opening or self._opened_at is not None:
+                return
+            self._opening = True
+        threading.Thread(target=self._open, name="main-open", daemon=True).start()
+
+    def poll(self, now=None):
+        """Close the stream if it has not been wanted for ``idle`` seconds."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._opened_at is None or now - self._last_want < self.idle:
+                return
+            self.active_s += now - self._opened_at
+            self._opened_at = None
+        self.reader.stop()
+
+    def latest(self):
+        """``(frame, frame_ts)`` of the newest main-stream frame, or ``(None, 0.0)`` while closed."""
+        if self._opened_at is None:
+            return None, 0.0
+        return self.reader.latest()
+
+    @property
+    def running(self):
+        return self._opened_at is not None
+
+    def close(self):
+        self.poll(float("inf"))
+
+    def stats(self):
+        active = self.active_s + (time.monotonic() - self._opened_at if self._opened_at is not None else 0.0)
+        return {"running": self.running, "opens": self.opens, "open_failures": self.open_failures,
+                "active_s": round(active, 1), "read": self.reader.frames_read}
+
+
+class DualStreamDetector:
+    """Motion on the sub-stream, YOLO on the matching high-resolution main-stream crops.
+
+    The pipeline keeps reading, gating and displaying the cheap sub-stream
+    (``subtype=1``). When the motion gate reports regions, :meth:`prepare`
+    maps them onto the newest main-stream (``subtype=0``) frame, cuts out one
+    crop per cluster of activity and enhances each crop at inference size;
+    :meth:`detect` runs them as one detector batch and returns boxes in
+    sub-stream pixels, so tracking, drawing and logging are unchanged. A
+    distant nilgai keeps the main stream's detail, yet only the moving part
+    of the frame is ever sent to YOLO.
+
+    The main stream is opened on the first motion and closed after ``idle``
+    quiet seconds (:class:`OnDemandReader`), so main-stream decoding also
+    scales with activity. :meth:`prepare` returns ``None`` while no main frame
+    within ``max_skew`` seconds of the sub frame is available (stream still
+    connecting); the caller then runs the usual full sub-frame inference.
+    """
+
+    def __init__(self, open_main, detector, size=640, min_crop=320, pad=0.25, max_crops=4,
+                 idle=10.0, max_skew=0.5, iou=0.5, metrics=None, **preprocess):
+        self.main = OnDemandReader(open_main, idle=idle, metrics=metrics)
+        self.detector = detector
+        self.min_crop = min_crop
+        self.pad = pad
+        self.max_crops = max_crops
+        self.max_skew = max_skew
+        self.iou = iou
+        # One letterbox + preprocessor per crop slot: crop sizes differ, buffers are reused
+        self._lbs = [Letterbox((size, size)) for _ in range(max_crops)]
+        self._pres = [FramePreprocessor(letterbox=lb, **preprocess) for lb in self._lbs]
+
+        # Counters
+        self.frames = 0
+        self.fallbacks = 0  # motion, but no usable main frame
+        self.crops_run = 0
+        self.crop_px = 0  # main-stream pixels sent to YOLO
+
+    def prepare(self, frame, regions, ts=None):
+        """Crop and enhance the main-stream regions for sub-stream ``frame``; ``None`` to fall back."""
+        ts = time.monotonic() if ts is None else ts
+        self.main.want(ts)
+        self.main.poll(ts)
+        main, main_ts = self.main.latest()
+        if main is None or abs(main_ts - ts) > self.max_skew:
+            self.fallbacks += 1
+            return None
+        scale = np.array([main.shape[1] / frame.shape[1], main.shape[0] / frame.shape[0]])
+        windows = crop_windows(regions, scale, main.shape, self.min_crop, self.pad, self.max_crops)
+        imgs, geometry = [], []
+        for pre, lb, (x1, y1, x2, y2) in zip(self._pres, self._lbs, windows.tolist()):
+            imgs.append(pre(main[y1:y2, x1:x2]).copy())
+            geometry.append((lb.scale, *lb.pad))  # slot geometry may change before detect() runs
+        return imgs, windows, geometry, scale
+
+    def detect(self, job):
+        """Run a prepared job; returns (N, 6) boxes in sub-stream pixels."""
+        imgs, windows, geometry, scale = job
+        self.frames += 1
+        self.crops_run += len(windows)
+        self.crop_px += int(np.prod(windows[:, 2:] - windows[:, :2], axis=1).sum())
+        if not imgs:
+            return np.zeros((0, 6), dtype=np.float32)
+        parts = []
+        for det, (s, left, top), (x1, y1, x2, y2) in zip(self.detector.batch(imgs), geometry, windows.tolist()):
+            det = np.array(det, dtype=np.float32, copy=True)
+            det[:, :4] -= (left, top, left, top)
+            det[:, :4] /= s
+            np.clip(det[:, :4], 0, (x2 - x1, y2 - y1, x2 - x1, y2 - y1), out=det[:, :4])
+            det[:, :4] += (x1, y1, x1, y1)
+            parts.append(det)
+        det = merge_nms(np.concatenate(parts), self.iou)
+        det[:, :4] /= np.tile(scale, 2).astype(np.float32)
+        return det
+
+    def poll(self, ts=None):
+        """Call on frames without motion so the main stream closes once the field is quiet."""
+        self.main.poll(ts)
+
+    def close(self):
+        self.main.close()
+
+    def stats(self):
+        return {"frames": self.frames, "fallbacks": self.fallbacks,
+                "crops_per_frame": self.crops_run / max(1, self.frames),
+                "crop_mpx_per_frame": self.crop_px / max(1, self.frames) / 1e6,
+                "main": self.main.stats()}
@@ -0,0 +1,323 @@
+import random
+import threading
+import time
+import cv2
+
+
+def open_http_capture(url, fps=10, width=640, height=480):
+    """Open the Dahua HTTP stream with the low-latency settings used by the detection scripts."""
+    cap = cv2.VideoCapture(url)  # Use HTTP instead of RTSP
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer size for lower latency
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    return cap
+
+
+class LatestFrameReader:
+    """Background capture thread that keeps only the newest decoded frame.
+
+    The reader owns the ``cv2.VideoCapture`` and reads it as fast as the camera
+    delivers. Every decoded frame overwrites a one-slot mailbox, so the
+    inference loop always gets the freshest frame and never waits on network
+    reads or demuxing. Frames that were overwritten before anyone consumed them
+    are counted in ``dropped``.
+    """
+
+    def __init__(self, open_capture, name="capture", metrics=None):
+        # open_capture: zero-argument callable returning an opened cv2.VideoCapture
+        self._open_capture = open_capture
+        self.name = name
+        self.metrics = metrics  # optional metrics.Metrics; records "capture" (read + decode time)
+        self.cap = None
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_ts = 0.0  # time.monotonic() when the frame was decoded
+        self._seq = 0  # increments for every decoded frame
+        self._consumed_seq = 0
+
+        self._running = False
+        self._stop = None  # threading.Event of the current worker
+        self._thread = None
+
+        # Counters
+        self.frames_read = 0
+        self.frames_consumed = 0
+        self.dropped = 0
+        self.read_errors = 0
+        self.abandoned = 0  # workers still blocked in a read when stop() gave up on them
+
+    # ---------------- lifecycle ----------------
+    def start(self):
+        cap = self._open_capture()
+        if cap is None or not cap.isOpened():
+            if cap is not None:
+                cap.release()
+            return False
+        # Each start gets its own capture and stop flag: a worker that stop()
+        # could not join (blocked in cap.read() on a stalled stream) keeps
+        # its own capture and exits at its next check instead of reading ours
+        self.cap = cap
+        with self._cond:
+            self._consumed_seq = self._seq  # never hand out a frame of the previous stream
+        self._stop = threading.Event()
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, args=(cap, self._stop), name=self.name, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        if self._stop is not None:
+            self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        thread = self._thread
+        self._thread = self.cap = self._stop = None
+        if thread is not None:
+            thread.join(timeout=timeout)
+            if thread.is_alive():
+                self.abandoned += 1  # the worker releases its capture once the read returns
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------------- capture thread ----------------
+    def _worker(self, cap, stop):
+        try:
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                ok, frame = cap.read()
+                if stop.is_set():
+                    break  # stopped while reading: this frame belongs to a closed stream
+                if not ok or frame is None or frame.size == 0:
+                    self.read_errors += 1
+                    time.sleep(0.01)
+                    continue
+                ts = time.monotonic()
+                if self.metrics is not None:
+                    self.metrics.observe("capture", time.perf_counter() - t0)
+                with self._cond:
+                    if self._seq > self._consumed_seq:
+                        self.dropped += 1  # previous frame was never consumed
+                    self._frame = frame
+                    self._frame_ts = ts
+                    self._seq += 1
+                    self.frames_read += 1
+                    self._cond.notify_all()
+        finally:
+            cap.release()  # only this thread ever reads it, so only this thread releases it
+
+    # ---------------- consumer API ----------------
+    def read(self, timeout=None):
+        """Return ``(ok, frame, frame_ts)`` for the newest frame not yet consumed.
+
+        Waits up to ``timeout`` seconds for a new frame (``None`` waits until one
+        arrives or the reader stops, ``0`` never waits).
+        """
+        with self._cond:
+            if self._seq <= self._consumed_seq:
+                if timeout == 0:
+                    return False, None, 0.0
+                self._cond.wait_for(lambda: self._seq > self._consumed_seq or not self._running,
+                                    timeout=timeout)
+            if self._seq <= self._consumed_seq:
+                return False, None, 0.0
+            self._consumed_seq = self._seq
+            self.frames_consumed += 1
+            return True, self._frame, self._frame_ts
+
+    def latest(self):
+        """Return ``(frame, frame_ts)`` for the newest frame, even if it was already consumed."""
+        with self._cond:
+            return self._frame, self._frame_ts
+
+    def frame_age(self):
+        """Seconds since the newest frame was decoded (``inf`` before the first frame)."""
+        if self._frame_ts == 0.0:
+            return float("inf")
+        return time.monotonic() - self._frame_ts
+
+    def valid(self, frame_ts):
+        """Frames from this reader are never overwritten (see ``ShmFrameReader.valid``)."""
+        return True
+
+    @property
+    def running(self):
+        return self._running
+
+    def stats(self):
+        return {
+            "read": self.frames_read,
+            "consumed": self.frames_consumed,
+            "dropped": self.dropped,
+            "read_errors": self.read_errors,
+            "abandoned": self.abandoned,
+            "frame_age": self.frame_age(),
+        }
+
+
+class StreamSupervisor:
+    """Watch a frame reader and reconnect it in the background when the stream stalls.
+
+    A monitor thread treats the stream as down once the newest frame is older
+    than ``stall_timeout`` seconds (or the reader stopped), calls ``on_down``
+    (e.g. switch the deterrent off) and then restarts the reader with
+    jittered exponential backoff -- ``backoff`` doubling up to
+    ``backoff_max``, each wait randomised by +/- ``jitter`` so several boxes
+    on one network do not hammer the camera in lockstep. The detection loop
+    is never blocked by reconnects.
+
+    :meth:`read` has the reader's signature plus a ``stale`` flag: while the
+    stream is down it keeps returning a copy of the last good frame every
+    ``stale_interval`` seconds with ``stale=True``, so displays stay alive and
+    the loop can fail safe instead of spinning on ``continue``.
+    """
+
+    def __init__(self, reader, stall_timeout=5.0, backoff=1.0, backoff_max=30.0, jitter=0.3,
+                 stale_interval=1.0, on_down=None, on_up=None):
+        self.reader = reader
+        self.stall_timeout = stall_timeout
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.stale_interval = stale_interval
+        self.on_down = on_down
+        self.on_up = on_up
+
+        self._lock = threading.Lock()  # held while the reader is being stopped/started
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._stale_frame = None
+        self._stale_ts = 0.0
+        self.down = False
+        self._down_since = 0.0
+        self._up_since = 0.0  # a (re)connected reader gets stall_timeout to deliver its first frame
+
+        # Counters
+        self.outages = 0
+        self.reconnect_attempts = 0
+        self.reconnects = 0  # successful
+        self.downtime = 0.0  # seconds, finished outages only
+        self.last_error = None
+
+    # ---------------- lifecycle ----------------
+    def start(self):
+        """Start the reader and the monitor; a failed first connect is retried in the background."""
+        ok = self.reader.start()
+        self._running = True
+        self._up_since = time.monotonic()
+        if not ok:
+            self._mark_down("cannot open stream")
+        self._thread = threading.Thread(target=self._monitor, name="stream-watchdog", daemon=True)
+        self._thread.start()
+        return ok
+
+    def stop(self, timeout=2.0):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        with self._lock:
+            self.reader.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------------- consumer API ----------------
+    def read(self, timeout=None):
+        """Return ``(ok, frame, frame_ts, stale)``; see the class docstring for ``stale``."""
+        if not self.down and self._lock.acquire(timeout=timeout if timeout is not None else -1):
+            try:
+                ok, frame, ts = self.reader.read(timeout=timeout)
+            finally:
+                self._lock.release()
+            if ok:
+                return True, frame, ts, False
+        if self.down and self._stale_frame is not None:
+            time.sleep(self.stale_interval if timeout is None else min(timeout, self.stale_interval))
+            return True, self._stale_frame, self._stale_ts, True
+        if self.down and timeout:
+            time.sleep(timeout)
+        return False, None, 0.0, False
+
+    def valid(self, frame_ts):
+        return frame_ts == self._stale_ts or self.reader.valid(frame_ts)
+
+    def frame_age(self):
+        return self.reader.frame_age()
+
+    @property
+    def running(self):
+        return self._running
+
+    def stats(self):
+        current = time.monotonic() - self._down_since if self.down else 0.0
+        return dict(self.reader.stats(), state="down" if self.down else "up", outages=self.outages,
+                    reconnect_attempts=self.reconnect_attempts, reconnects=self.reconnects,
+                    downtime_s=self.downtime + current, current_outage_s=current, last_error=self.last_error)
+
+    # ---------------- monitor thread ----------------
+    def _mark_down(self, reason):
+        frame, ts = self.reader.latest()
+        if frame is not None:
+            self._stale_frame, self._stale_ts = frame.copy(), ts  # the reader may recycle its buffer
+        self.down = True
+        self._down_since = time.monotonic()
+        self.outages += 1
+        self.last_error = reason
+        print(f"[WATCHDOG] stream down: {reason}")
+        if self.on_down is not None:
+            self.on_down()
+
+    def _monitor(self):
+        delay = self.backoff
+        while self._running:
+            if not self.down:
+                age = min(self.reader.frame_age(), time.monotonic() - self._up_since)
+                if not self.reader.running or age > self.stall_timeout:
+                    self._mark_down(f"no frame for {age:.1f} s" if self.reader.running else "reader stopped")
+                    delay = self.backoff
+                else:
+                    self._wake.wait(min(1.0, self.stall_timeout / 4))
+                    continue
+
+            wait = delay * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+            print(f"[WATCHDOG] reconnecting in {wait:.1f} s (attempt {self.reconnect_attempts + 1})")
+            if self._wake.wait(wait):
+                break  # stop() was called
+            self.reconnect_attempts += 1
+            with self._lock:
+                self.reader.stop()
+                ok = self.reader.start()
+            if ok and self._await_frame():
+                outage = time.monotonic() - self._down_since
+                self.downtime += outage
+                self.reconnects += 1
+                self._up_since = time.monotonic()
+                self.down = False
+                print(f"[WATCHDOG] stream restored after {outage:.1f} s")
+                if self.on_up is not None:
+                    self.on_up()
+            else:
+                self.last_error = "reconnect failed"
+                delay = min(self.backoff_max, delay * 2)
+
+    def _await_frame(self):
+        deadline = time.monotonic() + self.stall_timeout
+        while self._running and time.monotonic() < deadline:
+            if self.reader.frame_age() < self.stall_timeout:
+                return True
+            time.sleep(0.05)
+        return False
@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+
+
+class Letterbox:
+    """Aspect-preserving resize + pad to the model input size, with box back-projection.
+
+    Scale, padding and the padded canvas are computed once per source geometry
+    (a camera stream never changes size), so each frame only costs one
+    ``cv2.resize`` and a copy into the canvas. :meth:`to_source` maps a whole
+    detection array back to source-frame pixels in one vectorized step.
+    """
+
+    def __init__(self, size=(640, 640), color=(114, 114, 114)):
+        self.size = tuple(size)  # (width, height) of the model input
+        self.color = color
+        self.src_shape = None  # (h, w) the cached geometry was built for
+        self.scale = 1.0
+        self.pad = (0, 0)  # (left, top) in model-input pixels
+        self._resized_wh = self.size
+        self._canvas = None
+        self._offset = np.zeros(4, dtype=np.float32)
+        self._limit = np.zeros(4, dtype=np.float32)
+
+    def _prepare(self, h, w, channels):
+        out_w, out_h = self.size
+        self.scale = min(out_w / w, out_h / h)
+        new_w, new_h = int(round(w * self.scale)), int(round(h * self.scale))
+        left, top = (out_w - new_w) // 2, (out_h - new_h) // 2
+        self.pad = (left, top)
+        self._resized_wh = (new_w, new_h)
+        self._canvas = np.empty((out_h, out_w, channels), dtype=np.uint8)
+        self._canvas[:] = self.color[:channels]
+        self._offset[:] = (left, top, left, top)
+        self._limit[:] = (w, h, w, h)
+        self.src_shape = (h, w)
+
+    def __call__(self, img):
+        """Return the letterboxed image (an internal buffer, overwritten by the next call)."""
+        h, w = img.shape[:2]
+        if self.src_shape != (h, w) or self._canvas.shape[2] != img.shape[2]:
+            self._prepare(h, w, img.shape[2])
+        left, top = self.pad
+        new_w, new_h = self._resized_wh
+        if (new_w, new_h) == (w, h):
+            self._canvas[top:top + new_h, left:left + new_w] = img
+        else:
+            self._canvas[top:top + new_h, left:left + new_w] = cv2.resize(img, (new_w, new_h),
+                                                                          interpolation=cv2.INTER_LINEAR)
+        return self._canvas
+
+    def to_source(self, det):
+        """Map ``det[:, :4]`` (x1, y1, x2, y2 in model-input pixels) back to the source frame.
+
+        Returns a new float32 array; any extra columns (conf, cls, ...) are kept.
+        """
+        out = np.array(det, dtype=np.float32, copy=True)
+        if not len(out):
+            return out
+        boxes = out[:, :4]
+        boxes -= self._offset
+        boxes /= self.scale
+        np.clip(boxes, 0, self._limit, out=boxes)
+        return out
@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "t0")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.t0)
+
+
+class Metrics:
+    """Per-stage latency windows with p50/p95/p99, dumped as JSON or served over HTTP.
+
+    Each stage keeps its last ``window`` samples (seconds, measured with
+    ``time.perf_counter``). Recording a sample is a locked append to a deque,
+    cheap enough for every frame of every worker thread; percentiles are only
+    computed when a summary is requested.
+
+        metrics = Metrics()
+        with metrics.time("annotation"):
+            ...
+        metrics.observe("inference", seconds)
+        metrics.start_dump("metrics.json", interval=10)   # and/or
+        metrics.serve(8765)                               # curl localhost:8765/metrics
+    """
+
+    TOTALS = ("end_to_end",)  # spans several stages; never reported as the slowest stage
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.started_at = time.monotonic()
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._dump_thread = None
+        self._server = None
+        self._running = True
+
+    # ---------------- recording ----------------
+    def observe(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+            samples.append(seconds)
+            self._counts[stage] += 1
+
+    def time(self, stage):
+        """Context manager timing the enclosed block as one ``stage`` sample."""
+        return _Timer(self, stage)
+
+    # ---------------- reporting ----------------
+    def summary(self):
+        uptime = time.monotonic() - self.started_at
+        stages = {}
+        with self._lock:
+            items = [(stage, list(samples), self._counts[stage]) for stage, samples in self._samples.items()]
+        for stage, values, count in items:
+            values.sort()
+            if not values:
+                continue
+            n = len(values)
+            pick = lambda q: 1000.0 * values[min(n - 1, int(q * n))]
+            stages[stage] = {
+                "count": count,
+                "rate": count / max(1e-6, uptime),
+                "mean_ms": 1000.0 * sum(values) / n,
+                "p50_ms": pick(0.50),
+                "p95_ms": pick(0.95),
+                "p99_ms": pick(0.99),
+                "max_ms": 1000.0 * values[-1],
+            }
+        # The stage with the highest median is what limits throughput
+        slowest = max((s for s in stages if s not in self.TOTALS), key=lambda s: stages[s]["p50_ms"], default=None)
+        return {"uptime_s": uptime, "window": self.window, "slowest": slowest, "stages": stages}
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
+
+    def start_dump(self, path="metrics.json", interval=10.0, echo=False):
+        """Rewrite ``path`` with the current summary every ``interval`` seconds."""
+        def loop():
+            while self._running:
+                time.sleep(interval)
+                data = self.to_json()
+                tmp = path + ".tmp"
+                with open(tmp, "w") as f:
+                    f.write(data)
+                os.replace(tmp, path)  # readers never see a half-written file
+                if echo:
+                    s = self.summary()
+                    print("[METRICS] " + ", ".join(f"{k} p50={v['p50_ms']:.1f} p95={v['p95_ms']:.1f} ms"
+                                                   for k, v in s["stages"].items()) + f" | slowest: {s['slowest']}")
+
+        self._dump_thread = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+        self._dump_thread.start()
+
+    def serve(self, port=8765, host="127.0.0.1"):
+        """Serve the summary as JSON at ``http://host:port/metrics`` from a background thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.to_json().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # keep the detection loop's console readable
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[METRICS] serving on http://{host}:{port}/metrics")
+
+    def close(self):
+        self._running = False
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
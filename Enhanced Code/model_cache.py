@@ -0,0 +1,94 @@
+import hashlib
+import os
+import shutil
+import time
+import numpy as np
+
+# Optimised model artifacts live here, named after the SHA-256 of the weights
+# they were built from, so retraining (new best.pt) never reuses a stale export.
+CACHE_DIR = os.environ.get("NILBYE_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "nilbye"))
+
+
+def weights_hash(path, chunk=1 << 20):
+    """First 16 hex digits of the SHA-256 of ``path``."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def cache_path(weights, suffix, cache_dir=CACHE_DIR):
+    """Cache file for ``weights`` + ``suffix`` (e.g. ``"640.torchscript"``); the directory is created."""
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    return os.path.join(cache_dir, f"{stem}-{weights_hash(weights)}-{suffix}")
+
+
+def cached_export(weights, fmt="torchscript", imgsz=640, cache_dir=CACHE_DIR):
+    """Path of an ultralytics export of ``weights`` (``"torchscript"`` or ``"onnx"``), exporting on first use.
+
+    The export is fused and traced at ``imgsz``, so loading it skips the
+    pickle/fuse work ``YOLO("best.pt")`` repeats on every launch. Falls back
+    to ``weights`` if the export fails.
+    """
+    ext = {"torchscript": "torchscript", "onnx": "onnx"}[fmt]
+    target = cache_path(weights, f"{imgsz}.{ext}", cache_dir)
+    if os.path.exists(target):
+        return target
+    try:
+        from ultralytics import YOLO
+        t0 = time.monotonic()
+        exported = YOLO(weights).export(format=fmt, imgsz=imgsz, device="cpu")
+        tmp = target + ".tmp"
+        shutil.move(str(exported), tmp)
+        os.replace(tmp, target)  # a power cut mid-export never leaves a half-written cache entry
+        print(f"[STARTUP] cached {fmt} export of {weights} in {time.monotonic() - t0:.1f} s -> {target}")
+        return target
+    except Exception as e:
+        print(f"[STARTUP] {fmt} export failed ({e}); loading {weights} directly")
+        return weights
+
+
+def warm_up(detector, size=(640, 640), runs=2):
+    """Run ``detector`` on blank frames so lazy initialisation is paid before the first real frame."""
+    img = np.full((size[1], size[0], 3), 114, dtype=np.uint8)
+    t0 = time.monotonic()
+    for _ in range(runs):
+        detector(img)
+    return time.monotonic() - t0
+
+
+def process_uptime():
+    """Seconds since this process was started (Linux ``/proc``), or 0.0 if unavailable."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupTimer:
+    """Milestones of a launch, measured from process start (so imports count too).
+
+        startup = StartupTimer()
+        ...load model...
+        startup.mark("model loaded")
+        startup.mark("first detection")   # only the first call per name is kept
+    """
+
+    def __init__(self):
+        self.t0 = time.monotonic() - process_uptime()
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.monotonic() - self.t0
+            print(f"[STARTUP] {name}: {self.marks[name]:.2f} s after launch")
+        return self.marks[name]
+
+    def stats(self):
+        return {k: round(v, 3) for k, v in self.marks.items()}
@@ -0,0 +1,124 @@
+import time
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decide per frame whether YOLO has to run, from a cheap downscaled motion check.
+
+    The frame is shrunk to ``width`` pixels wide, converted to grey and compared
+    with a background model:
+
+    * ``"diff"`` -- absolute difference against a running average of past frames
+      (``cv2.accumulateWeighted``); the cheapest option
+    * ``"mog2"`` -- ``cv2.createBackgroundSubtractorMOG2`` as in ``ptz_autozoom.py``;
+      copes better with swaying grass and changing light, at a few times the cost
+
+    A frame counts as moving when more than ``min_area`` (fraction of the frame)
+    of its pixels changed. Inference keeps running for ``hold`` seconds after
+    the last motion so an animal that stops is still confirmed, and is forced
+    every ``refresh`` seconds regardless so stationary animals are not missed.
+
+        gate = MotionGate()
+        if gate(frame):
+            det = detector(...)
+    """
+
+    def __init__(self, method="diff", width=160, threshold=25, min_area=0.002,
+                 hold=2.0, refresh=5.0, alpha=0.05, history=300, var_threshold=22):
+        if method not in ("diff", "mog2"):
+            raise ValueError(f"unknown motion method {method!r}")
+        self.method = method
+        self.width = width
+        self.threshold = threshold
+        self.min_area = min_area
+        self.hold = hold
+        self.refresh = refresh
+        self.alpha = alpha  # running-average update rate for "diff"
+        self._mog2 = (cv2.createBackgroundSubtractorMOG2(history=history, varThreshold=var_threshold,
+                                                         detectShadows=False)
+                      if method == "mog2" else None)
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self._bg = None  # float32 running average ("diff")
+        self._small = None
+        self._gray = None
+        self._scale = 1.0  # source pixels per mask pixel
+        self.mask = None  # last binary motion mask (uint8, downscaled)
+        self.moving = False
+        self.last_motion = float("-inf")
+        self.last_infer = float("-inf")
+
+        # Counters
+        self.frames = 0
+        self.inferred = 0
+        self.forced = 0  # inferences triggered only by the refresh timer
+
+    def _detect(self, frame):
+        h, w = frame.shape[:2]
+        small_w = min(self.width, w)
+        small_h = max(1, int(round(h * small_w / w)))
+        self._scale = w / small_w
+        if self._small is None or self._small.shape[:2] != (small_h, small_w):
+            self._small = np.empty((small_h, small_w) + frame.shape[2:], dtype=np.uint8)
+            self._gray = np.empty((small_h, small_w), dtype=np.uint8)
+            self._bg = None
+        cv2.resize(frame, (small_w, small_h), dst=self._small, interpolation=cv2.INTER_AREA)
+        if self._small.ndim == 3:
+            cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            self._gray[:] = self._small
+        cv2.GaussianBlur(self._gray, (5, 5), 0, dst=self._gray)
+
+        if self._mog2 is not None:
+            fg = self._mog2.apply(self._gray)
+            _, fg = cv2.threshold(fg, 200, 255, cv2.THRESH_BINARY)
+        else:
+            if self._bg is None:
+                self._bg = self._gray.astype(np.float32)
+            fg = cv2.absdiff(self._gray, cv2.convertScaleAbs(self._bg))
+            _, fg = cv2.threshold(fg, self.threshold, 255, cv2.THRESH_BINARY)
+            cv2.accumulateWeighted(self._gray, self._bg, self.alpha)
+        self.mask = cv2.morphologyEx(fg, cv2.MORPH_OPEN, self._kernel)
+        return cv2.countNonZero(self.mask) > self.min_area * self.mask.size
+
+    def __call__(self, frame, now=None):
+        """Return ``True`` if inference should run on ``frame``."""
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        self.moving = self._detect(frame)
+        if self.moving:
+            self.last_motion = now
+        run = now - self.last_motion <= self.hold
+        if not run and now - self.last_infer >= self.refresh:
+            run = True
+            self.forced += 1
+        if run:
+            self.inferred += 1
+            self.last_infer = now
+        return run
+
+    def regions(self, min_area=None, pad=8):
+        """Bounding boxes ``(x1, y1, x2, y2)`` of moving blobs in source-frame pixels."""
+        if self.mask is None:
+            return []
+        min_px = (self.min_area if min_area is None else min_area) * self.mask.size
+        cnts = cv2.findContours(self.mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        cnts = cnts[0] if len(cnts) == 2 else cnts[1]
+        h, w = self.mask.shape[:2]
+        out = []
+        for c in cnts:
+            if cv2.contourArea(c) < min_px:
+                continue
+            x, y, bw, bh = cv2.boundingRect(c)
+            out.append((int(max(0, x - pad) * self._scale), int(max(0, y - pad) * self._scale),
+                        int(min(w, x + bw + pad) * self._scale), int(min(h, y + bh + pad) * self._scale)))
+        return out
+
+    def stats(self):
+        return {
+            "method": self.method,
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "forced": self.forced,
+            "skip_rate": 1.0 - self.inferred / max(1, self.frames),
+        }
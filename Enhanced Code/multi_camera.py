@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# Multi-camera mode: one process, one model, N Dahua streams.
+# The newest frame of every camera is preprocessed, run through the detector as
+# a single batch, and the boxes are routed back to the camera they came from.
+#
+#   python3 multi_camera.py --model v8 --weights best.pt \
+#       --source gate=http://admin:pw@192.168.188.37/cgi-bin/mjpg/video.cgi?channel=1&subtype=1 \
+#       --source field=rtsp://admin:pw@192.168.188.38:554/cam/realmonitor?channel=1&subtype=1
+
+import argparse, time
+import cv2
+from frame_reader import LatestFrameReader, open_http_capture
+from preprocessing import FramePreprocessor
+from letterbox import Letterbox
+from postprocess import as_records, select, labels, draw_detections
+
+
+class Camera:
+    """Per-stream state: reader plus its own letterbox/preprocessor buffers."""
+
+    def __init__(self, name, url, size=(640, 640)):
+        self.name = name
+        self.url = url
+        self.reader = LatestFrameReader(lambda: open_http_capture(url), name=f"capture-{name}")
+        self.letterbox = Letterbox(size)
+        self.preprocessor = FramePreprocessor(letterbox=self.letterbox)
+        self.frames = 0
+        self.detections = 0
+        self.alert = False  # newest processed frame had a detection above --conf
+        self.last_frame = 0.0  # time.monotonic() of the newest processed frame
+
+
+class MultiCameraInference:
+    """Collect the newest frame from each camera and run them as one detector batch.
+
+    ``detector`` is an :class:`detectors.UltralyticsDetector` or
+    :class:`detectors.YoloV5Detector`; only one model is loaded no matter how
+    many cameras are attached, so memory stays roughly flat as cameras are
+    added while the per-frame inference cost drops with the batch size.
+    """
+
+    def __init__(self, sources, detector, size=(640, 640)):
+        self.detector = detector
+        self.cameras = [Camera(name, url, size) for name, url in sources]
+        self.batches = 0
+        self.batched_frames = 0
+        self.infer_time = 0.0
+
+    def start(self):
+        """Open every stream; returns the names of cameras that failed to open."""
+        return [cam.name for cam in self.cameras if not cam.reader.start()]
+
+    def stop(self):
+        for cam in self.cameras:
+            cam.reader.stop()
+
+    def step(self, timeout=0.5):
+        """Run one batch. Returns ``[(camera, frame, det), ...]`` with ``det`` in frame pixels."""
+        deadline = time.monotonic() + timeout
+        ready = []
+        while True:
+            for cam in self.cameras:
+                ok, frame, _ = cam.reader.read(timeout=0)
+                if ok:
+                    ready.append((cam, frame))
+            if ready or time.monotonic() >= deadline:
+                break
+            time.sleep(0.005)
+        if not ready:
+            return []
+
+        # Each camera has its own preprocessor, so its output buffer is not shared
+        imgs = [cam.preprocessor(frame) for cam, frame in ready]
+        t0 = time.perf_counter()
+        dets = self.detector.batch(imgs)
+        self.infer_time += time.perf_counter() - t0
+        self.batches += 1
+        self.batched_frames += len(imgs)
+
+        out = []
+        for (cam, frame), det in zip(ready, dets):
+            det = cam.letterbox.to_source(det)
+            cam.frames += 1
+            cam.last_frame = time.monotonic()
+            cam.detections += len(det)
+            out.append((cam, frame, det))
+        return out
+
+    def stats(self):
+        n = max(1, self.batches)
+        return {
+            "batches": self.batches,
+            "avg_batch": self.batched_frames / n,
+            "ms_per_batch": 1000.0 * self.infer_time / n,
+            "ms_per_frame": 1000.0 * self.infer_time / max(1, self.batched_frames),
+            "cameras": {cam.name: dict(cam.reader.stats(), frames=cam.frames, detections=cam.detections)
+                        for cam in self.cameras},
+        }
+
+
+def load_detector(kind, weights, device="cpu", metrics=None):
+    from detectors import OnnxRuntimeDetector, UltralyticsDetector, YoloV5Detector
+    if kind == "v8":
+        from ultralytics import YOLO
+        return UltralyticsDetector(YOLO(weights), device=device, metrics=metrics)
+    if kind == "onnx":
+        return OnnxRuntimeDetector(weights, metrics=metrics)
+    from models.common import DetectMultiBackend  # yolov5 repo on sys.path
+    from utils.torch_utils import select_device
+    dev = select_device(device)
+    return YoloV5Detector(DetectMultiBackend(weights, device=dev), dev, metrics=metrics)
+
+
+def main():
+    p = argparse.ArgumentParser("Multi-camera batched YOLO (CPU)")
+    p.add_argument("--model", choices=("v8", "v5", "onnx"), default="v8",
+                   help="v8 = ultralytics YOLO, v5 = DetectMultiBackend, onnx = YOLOv5 .onnx on ONNX Runtime")
+    p.add_argument("--weights", required=True, help="best.pt / best.onnx")
+    p.add_argument("--source", action="append", required=True, metavar="NAME=URL",
+                   help="Camera stream; repeat for each camera")
+    p.add_argument("--size", type=int, default=None,
+                   help="Inference resolution (square); default: the model's fixed input size, else 640")
+    p.add_argument("--conf", type=float, default=0.5, help="Confidence threshold for alerts")
+    p.add_argument("--serial", default=None, help="Arduino port (e.g. /dev/ttyACM0) for LED/buzzer")
+    p.add_argument("--stale", type=float, default=5.0,
+                   help="Seconds without frames after which a camera no longer holds the alert")
+    p.add_argument("--show", action="store_true", help="Show one window per camera")
+    p.add_argument("--stats-every", type=float, default=10.0, help="Seconds between stats prints")
+    args = p.parse_args()
+
+    sources = []
+    for s in args.source:
+        name, sep, url = s.partition("=")
+        if not sep:
+            raise SystemExit(f"--source must be NAME=URL, got {s!r}")
+        sources.append((name, url))
+
+    detector = load_detector(args.model, args.weights)
+    fixed = getattr(detector, "input_hw", None)  # ONNX exports only accept their export size
+    if fixed is not None and args.size is not None and (args.size, args.size) != tuple(fixed):
+        raise SystemExit(f"--size {args.size} does not match the model's input size {fixed[1]}x{fixed[0]}")
+    size = (fixed[1], fixed[0]) if fixed is not None else (args.size or 640,) * 2
+    multi = MultiCameraInference(sources, detector, size=size)
+    failed = multi.start()
+    for name in failed:
+        print(f"[MULTI] Cannot open stream for camera '{name}'")
+    if len(failed) == len(sources):
+        raise SystemExit(1)
+
+    actuator = None
+    if args.serial:
+        from actuator import SerialActuator
+        actuator = SerialActuator(args.serial, 9600, min_on=2.0)
+
+    last_stats = time.monotonic()
+    try:
+        while True:
+            results = multi.step()
+            for cam, frame, det in results:
+                hits = select(as_records(det), args.conf)
+                cam.alert = len(hits) > 0  # a batch only updates the cameras it contains
+                if cam.alert:
+                    print(f"[{cam.name}] {len(hits)} detection(s): " + ", ".join(labels(hits, detector.names)))
+                if args.show:
+                    draw_detections(frame, hits, detector.names)
+                    cv2.imshow(f"YOLO - {cam.name}", frame)
+            now = time.monotonic()
+            for cam in multi.cameras:
+                if cam.alert and now - cam.last_frame > args.stale:
+                    cam.alert = False  # stream stalled: fail safe
+            if actuator is not None:
+                actuator.set(any(cam.alert for cam in multi.cameras))  # change-only, so cheap every loop
+            if args.show and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            if time.monotonic() - last_stats >= args.stats_every:
+                print(f"[MULTI] {multi.stats()}")
+                last_stats = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        multi.stop()
+        print(f"[MULTI] {multi.stats()}")
+        if args.show:
+            cv2.destroyAllWindows()
+        if actuator is not None:
+            actuator.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+
+
+class LatestQueue:
+    """Bounded queue between two stages; when full, the oldest item is dropped.
+
+    Stages never block a producer: a slow consumer only ever sees the newest
+    ``maxsize`` items, and everything it could not keep up with is counted in
+    ``dropped``.
+    """
+
+    def __init__(self, maxsize=1):
+        self._items = deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or ``None`` on timeout / after close()."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait_for(lambda: self._items or self._closed, timeout=timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Stage:
+    """One pipeline step: ``fn(packet) -> packet`` (return ``None`` to drop the frame).
+
+    With ``workers > 1`` the same ``fn`` is called from several threads at once,
+    so it must be thread-safe (YOLO inference is; FramePreprocessor, which
+    reuses its buffers, is not).
+    """
+
+    def __init__(self, name, fn, workers=1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0  # seconds spent inside fn
+        self._lock = threading.Lock()
+
+    def _account(self, dt, ok):
+        with self._lock:
+            self.busy += dt
+            if ok:
+                self.processed += 1
+            else:
+                self.errors += 1
+
+
+class Pipeline:
+    """Run capture -> stage -> ... -> consumer with one thread per stage worker.
+
+    ``source()`` is polled on its own thread and returns a packet (any object,
+    usually a dict holding the frame) or ``None`` when nothing new is available.
+    Stages are joined by :class:`LatestQueue` so a slow stage drops stale frames
+    instead of building a backlog, and end-to-end throughput approaches the
+    slowest stage rather than the sum of all stages. The consumer (display,
+    actuators) calls :meth:`get` on the main thread, which is where
+    ``cv2.imshow`` has to run anyway.
+    """
+
+    def __init__(self, source, stages, queue_size=1, metrics=None):
+        self.source = source
+        self.metrics = metrics  # optional metrics.Metrics; one sample per stage call
+        self.stages = list(stages)
+        self._queues = [LatestQueue(queue_size) for _ in range(len(self.stages) + 1)]
+        self._threads = []
+        self._running = False
+        self._seq = 0
+        self._last_seq = 0
+        self.out_of_order = 0  # results overtaken by a newer frame from a parallel worker
+        self.started_at = 0.0
+        self.delivered = 0
+
+    # ---------------- lifecycle ----------------
+    def start(self):
+        self._running = True
+        self.started_at = time.monotonic()
+        self._spawn("source", self._source_worker)
+        for i, stage in enumerate(self.stages):
+            for w in range(stage.workers):
+                self._spawn(f"{stage.name}-{w}", self._stage_worker, stage, self._queues[i], self._queues[i + 1])
+        return self
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        for q in self._queues:
+            q.close()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _spawn(self, name, target, *args):
+        t = threading.Thread(target=target, args=args, name=name, daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    # ---------------- workers ----------------
+    def _source_worker(self):
+        out = self._queues[0]
+        while self._running:
+            packet = self.source()
+            if packet is None:
+                continue
+            self._seq += 1
+            out.put((self._seq, packet))
+
+    def _stage_worker(self, stage, inq, outq):
+        while self._running:
+            item = inq.get(timeout=0.5)
+            if item is None:
+                continue
+            seq, packet = item
+            t0 = time.perf_counter()
+            try:
+                packet = stage.fn(packet)
+                ok = True
+            except Exception as e:
+                print(f"[PIPELINE] {stage.name} error: {e}")
+                packet, ok = None, False
+            dt = time.perf_counter() - t0
+            stage._account(dt, ok)
+            if self.metrics is not None:
+                self.metrics.observe(stage.name, dt)
+            if packet is not None:
+                outq.put((seq, packet))
+
+    # ---------------- consumer API ----------------
+    def get(self, timeout=None):
+        """Return the next finished packet, or ``None`` if none arrived within ``timeout``."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            item = self._queues[-1].get(timeout=remaining)
+            if item is None:
+                return None
+            seq, packet = item
+            if seq < self._last_seq:
+                self.out_of_order += 1
+                continue
+            self._last_seq = seq
+            self.delivered += 1
+            return packet
+
+    def stats(self):
+        elapsed = max(1e-6, time.monotonic() - self.started_at)
+        stages = {}
+        for i, s in enumerate(self.stages):
+            stages[s.name] = {
+                "workers": s.workers,
+                "processed": s.processed,
+                "errors": s.errors,
+                "ms": 1000.0 * s.busy / max(1, s.processed + s.errors),
+                "dropped_in": self._queues[i].dropped,
+            }
+        return {
+            "fps": self.delivered / elapsed,
+            "delivered": self.delivered,
+            "dropped_out": self._queues[-1].dropped,
+            "out_of_order": self.out_of_order,
+            "stages": stages,
+        }
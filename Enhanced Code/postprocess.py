@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+
+# One detection per record. All fields are float32 in the same order as the
+# detector output rows, so a contiguous (N, 6) array and a record array are
+# two views of the same memory and converting between them copies nothing.
+DETECTION_DTYPE = np.dtype([
+    ("x1", "<f4"), ("y1", "<f4"), ("x2", "<f4"), ("y2", "<f4"),
+    ("conf", "<f4"),
+    ("cls", "<f4"),
+])
+
+
+def as_records(det):
+    """View an (N, 6) ``[x1, y1, x2, y2, conf, cls]`` array as a DETECTION_DTYPE record array."""
+    if isinstance(det, np.ndarray) and det.dtype == DETECTION_DTYPE:
+        return det
+    det = np.ascontiguousarray(det, dtype=np.float32).reshape(-1, 6)
+    return det.view(DETECTION_DTYPE).reshape(-1)
+
+
+def as_array(rec):
+    """The (N, 6) float32 view of a record array (what the detectors and logger use)."""
+    return np.ascontiguousarray(rec).view(np.float32).reshape(-1, 6)
+
+
+def select(rec, conf=0.0, classes=None):
+    """Rows with ``conf >= conf`` and, if given, ``cls`` in ``classes`` -- one vector mask, no Python loop."""
+    mask = rec["conf"] >= conf
+    if classes is not None:
+        mask &= np.isin(rec["cls"].astype(np.int64), list(classes))
+    return rec[mask]
+
+
+def boxes(rec):
+    """(N, 4) int32 pixel corners, ready for cv2 drawing."""
+    return as_array(rec)[:, :4].astype(np.int32)
+
+
+def class_ids(rec):
+    return rec["cls"].astype(np.int64)
+
+
+def labels(rec, names):
+    """``"<name> <conf>"`` strings for every row, built with NumPy string ops."""
+    if not len(rec):
+        return []
+    if isinstance(names, dict):
+        names = [names.get(i, str(i)) for i in range(max(names) + 1)] if names else []
+    table = np.array(list(names) + ["?"])
+    ids = np.clip(class_ids(rec), -1, len(table) - 1)  # unknown ids fall on "?"
+    return np.char.add(np.char.add(table[ids], " "), np.char.mod("%.2f", rec["conf"])).tolist()
+
+
+def class_counts(rec, num_classes):
+    return np.bincount(class_ids(rec), minlength=num_classes)[:num_classes]
+
+
+def draw_detections(frame, rec, names, color=(0, 255, 0)):
+    """Draw boxes and labels in place; coordinates and strings are prepared for all rows at once."""
+    for (x1, y1, x2, y2), label in zip(boxes(rec).tolist(), labels(rec, names)):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame
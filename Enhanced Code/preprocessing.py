@@ -0,0 +1,133 @@
+import time
+import cv2
+import numpy as np
+
+DEFAULT_STAGES = ("bilateral", "clahe", "sharpen", "gamma")
+
+
+def preprocess_frame(frame):
+    """Original per-frame enhancement, kept as the reference for FramePreprocessor."""
+    filtered = cv2.bilateralFilter(frame, 5, 50, 50)
+    lab = cv2.cvtColor(filtered, cv2.COLOR_BGR2LAB)
+    l, a, b = cv2.split(lab)
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(6, 6))
+    l = clahe.apply(l)
+    lab = cv2.merge((l, a, b))
+    enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+
+    sharpen_kernel = np.array([[0, -0.5, 0],
+                               [-0.5, 3, -0.5],
+                               [0, -0.5, 0]])
+
+    sharpened = cv2.filter2D(enhanced, -1, sharpen_kernel)
+    gamma = 1.1
+    inv_gamma = 1.0 / gamma
+    table = np.array([(i / 255.0) ** inv_gamma * 255 for i in np.arange(0, 256)]).astype("uint8")
+    corrected = cv2.LUT(sharpened, table)
+
+    return corrected
+
+
+class FramePreprocessor:
+    """Bilateral -> CLAHE -> sharpen -> gamma enhancement with state built once.
+
+    The CLAHE object, sharpen kernel and gamma LUT are created in the
+    constructor, and every stage writes into a buffer that is reused from frame
+    to frame. With ``resize_first=True`` (default) the frame is resized to the
+    inference resolution before any filtering, so the filters run on 640x640
+    instead of the full camera frame. ``resize_first=False`` reproduces the old
+    ``preprocess_frame`` + ``cv2.resize`` output exactly. Pass a
+    :class:`letterbox.Letterbox` as ``letterbox`` to resize without distorting
+    the aspect ratio; its ``to_source`` then maps boxes back to the frame.
+
+    The returned image is an internal buffer: it is overwritten by the next
+    call, so copy it if it has to outlive the current frame.
+    """
+
+    def __init__(self, size=(640, 640), stages=DEFAULT_STAGES, resize_first=True,
+                 clip_limit=2.0, tile_grid=(6, 6), gamma=1.1,
+                 bilateral_d=5, bilateral_sigma=50, letterbox=None):
+        unknown = [s for s in stages if s not in DEFAULT_STAGES]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing stage(s): {unknown}")
+        self.letterbox = letterbox
+        if letterbox is not None:
+            size = letterbox.size
+        self.size = tuple(size) if size else None
+        self.stages = tuple(stages)
+        self.resize_first = resize_first
+        self.bilateral_d = bilateral_d
+        self.bilateral_sigma = bilateral_sigma
+
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid)
+        self.sharpen_kernel = np.array([[0, -0.5, 0],
+                                        [-0.5, 3, -0.5],
+                                        [0, -0.5, 0]])
+        inv_gamma = 1.0 / gamma
+        self.gamma_table = ((np.arange(256) / 255.0) ** inv_gamma * 255).astype(np.uint8)
+
+        self._buffers = {}
+        self._timings = {name: 0.0 for name in ("resize",) + self.stages}
+        self.frames = 0
+
+    def _buffer(self, name, shape):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            self._buffers[name] = buf
+        return buf
+
+    # ---------------- stages ----------------
+    def _resize(self, img):
+        if self.letterbox is not None:
+            return self.letterbox(img)
+        if self.size is None or (img.shape[1], img.shape[0]) == self.size:
+            return img
+        out = self._buffer("resize", (self.size[1], self.size[0], img.shape[2]))
+        return cv2.resize(img, self.size, dst=out)
+
+    def _bilateral(self, img):
+        out = self._buffer("bilateral", img.shape)
+        return cv2.bilateralFilter(img, self.bilateral_d, self.bilateral_sigma, self.bilateral_sigma, dst=out)
+
+    def _clahe(self, img):
+        lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB, dst=self._buffer("lab", img.shape))
+        l = cv2.extractChannel(lab, 0, dst=self._buffer("l", img.shape[:2]))
+        l_eq = self.clahe.apply(l, dst=self._buffer("l_eq", img.shape[:2]))
+        cv2.insertChannel(l_eq, lab, 0)
+        return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=self._buffer("clahe", img.shape))
+
+    def _sharpen(self, img):
+        out = self._buffer("sharpen", img.shape)
+        return cv2.filter2D(img, -1, self.sharpen_kernel, dst=out)
+
+    def _gamma(self, img):
+        out = self._buffer("gamma", img.shape)
+        return cv2.LUT(img, self.gamma_table, dst=out)
+
+    # ---------------- public API ----------------
+    def __call__(self, frame):
+        img = frame
+        if self.resize_first:
+            img = self._timed("resize", self._resize, img)
+        for name in self.stages:
+            img = self._timed(name, getattr(self, "_" + name), img)
+        if not self.resize_first:
+            img = self._timed("resize", self._resize, img)
+        self.frames += 1
+        return img
+
+    def _timed(self, name, fn, img):
+        t0 = time.perf_counter()
+        out = fn(img)
+        self._timings[name] += time.perf_counter() - t0
+        return out
+
+    def timings(self):
+        """Average milliseconds per frame for each stage."""
+        n = max(1, self.frames)
+        return {name: total * 1000.0 / n for name, total in self._timings.items()}
+
+    def reset_timings(self):
+        self._timings = dict.fromkeys(self._timings, 0.0)
+        self.frames = 0
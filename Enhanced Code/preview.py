@@ -0,0 +1,147 @@
+import select
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+
+
+def _peer_closed(sock):
+    """``True`` once the client has hung up (readable, but nothing to read)."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable) and not sock.recv(1, socket.MSG_PEEK)
+    except OSError:
+        return True
+
+
+class PreviewServer:
+    """MJPEG preview over HTTP for headless runs: ``http://<device>:<port>/`` in any browser.
+
+    The detection loop checks :attr:`active` and only draws boxes and calls
+    :meth:`submit` while at least one client is connected, so an unwatched
+    field device pays nothing for the preview. :meth:`submit` just replaces a
+    one-frame mailbox; an encoder thread JPEG-encodes the newest frame at most
+    ``fps`` times per second and every client thread sends the newest JPEG,
+    skipping any it was too slow to send. Nothing is ever queued.
+    """
+
+    BOUNDARY = b"frame"
+
+    def __init__(self, port=8080, host="0.0.0.0", fps=5.0, quality=70, width=None):
+        self.port = port
+        self.host = host
+        self.fps = fps
+        self.quality = quality
+        self.width = width  # downscale before encoding (None = as submitted)
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_seq = 0
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self._clients = 0
+        self._running = True
+
+        # Counters
+        self.submitted = 0
+        self.encoded = 0
+        self.sent = 0
+        self.client_drops = 0  # JPEGs a slow client never received
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/stream.mjpg"):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=" + server.BOUNDARY.decode())
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                server._stream(self.wfile, self.connection)
+
+            def log_message(self, *args):
+                pass  # keep the detection loop's console readable
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="preview-http", daemon=True).start()
+        self._encoder = threading.Thread(target=self._encode_loop, name="preview-encode", daemon=True)
+        self._encoder.start()
+        print(f"[PREVIEW] MJPEG preview on http://{host}:{port}/")
+
+    @property
+    def active(self):
+        """``True`` while at least one client is watching."""
+        return self._clients > 0
+
+    def submit(self, frame):
+        """Offer the newest annotated frame; the previous one is dropped if not yet encoded."""
+        with self._cond:
+            self._frame = frame
+            self._frame_seq += 1
+            self.submitted += 1
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        return {"clients": self._clients, "submitted": self.submitted, "encoded": self.encoded,
+                "sent": self.sent, "client_drops": self.client_drops}
+
+    # ---------------- encoder thread ----------------
+    def _encode_loop(self):
+        interval = 1.0 / self.fps
+        encoded_seq = 0
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: not self._running or (self._clients and self._frame_seq > encoded_seq))
+                if not self._running:
+                    return
+                frame, encoded_seq = self._frame, self._frame_seq
+            t0 = time.monotonic()
+            if self.width and frame.shape[1] > self.width:
+                frame = cv2.resize(frame, (self.width, int(frame.shape[0] * self.width / frame.shape[1])),
+                                   interpolation=cv2.INTER_AREA)
+            ok, buf = cv2.imencode(".jpg", frame, params)
+            if ok:
+                with self._cond:
+                    self._jpeg = buf.tobytes()
+                    self._jpeg_seq += 1
+                    self.encoded += 1
+                    self._cond.notify_all()
+            time.sleep(max(0.0, interval - (time.monotonic() - t0)))  # cap the preview frame rate
+
+    # ---------------- client threads ----------------
+    def _stream(self, wfile, sock):
+        with self._cond:
+            self._clients += 1
+            self._cond.notify_all()
+        sent_seq = self._jpeg_seq
+        try:
+            while True:
+                with self._cond:
+                    if not self._cond.wait_for(lambda: not self._running or self._jpeg_seq > sent_seq, timeout=1.0):
+                        if _peer_closed(sock):
+                            return  # left before the next frame: no write would ever notice
+                        continue
+                    if not self._running:
+                        return
+                    self.client_drops += self._jpeg_seq - sent_seq - 1
+                    jpeg, sent_seq = self._jpeg, self._jpeg_seq
+                wfile.write(b"--" + self.BOUNDARY + b"\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                            + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+                self.sent += 1
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._cond:
+                self._clients -= 1
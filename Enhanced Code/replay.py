@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# Offline replay of a video file or an image directory through the same
+# preprocess -> infer -> post-process path as the Enhanced loops, so FPS,
+# per-stage latency and detection counts can be reproduced on any Linux box:
+#
+#   python3 replay.py --model v8 --weights best.pt --source ../Dataset/val/images -o replay.json
+#   python3 replay.py --model onnx --weights best.onnx --source field.mp4 --fps 10
+#
+# Default is maximum speed (every frame processed in order). --fps N replays the
+# source as a live camera would deliver it: frames arriving while the previous
+# one is still being processed are dropped, and end-to-end latency is measured
+# from each frame's arrival time.
+
+import argparse, glob, json, os, time
+import cv2
+import numpy as np
+from letterbox import Letterbox
+from preprocessing import FramePreprocessor
+from metrics import Metrics
+from postprocess import as_records, class_counts, select
+from multi_camera import load_detector
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+IMAGE_EXTS = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+NOMINAL_FPS = 10.0  # camera rate the motion gate's hold/refresh timers assume at max speed
+
+
+def iter_frames(source, limit=None):
+    """Yield BGR frames from an image directory (sorted by name) or a video file."""
+    n = 0
+    if os.path.isdir(source):
+        paths = sorted(p for ext in IMAGE_EXTS for p in glob.glob(os.path.join(source, ext)))
+        for path in paths:
+            if limit is not None and n >= limit:
+                return
+            frame = cv2.imread(path)
+            if frame is not None:
+                n += 1
+                yield frame
+        return
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open {source}")
+    try:
+        while limit is None or n < limit:
+            ok, frame = cap.read()
+            if not ok:
+                return
+            n += 1
+            yield frame
+    finally:
+        cap.release()
+
+
+def replay(detector, source, size=640, conf=0.5, fps=None, limit=None, metrics=None, gate=None, tiler=None):
+    """Run ``source`` through the detection path; returns the report dict."""
+    metrics = metrics or Metrics(window=100000)
+    letterbox = Letterbox((size, size))
+    preprocessor = FramePreprocessor(letterbox=letterbox)
+    names = detector.names if isinstance(detector.names, dict) else dict(enumerate(detector.names))
+    per_class = np.zeros(max(names) + 1 if names else 1, dtype=np.int64)
+    frames = processed = dropped = with_det = 0
+    last_det = np.zeros((0, 6), dtype=np.float32)
+
+    it = iter_frames(source, limit)
+    start = time.monotonic()
+    while True:
+        t0 = time.perf_counter()
+        frame = next(it, None)
+        if frame is None:
+            break
+        metrics.observe("capture", time.perf_counter() - t0)
+        arrival = start + frames / fps if fps else time.monotonic()
+        frames += 1
+        if fps:
+            now = time.monotonic()
+            if now < arrival:
+                time.sleep(arrival - now)  # not delivered by the "camera" yet
+            elif now >= arrival + 1.0 / fps:
+                dropped += 1  # a newer frame had already arrived while we were busy
+                continue
+
+        run = gate is None or gate(frame, (frames - 1) / (fps or NOMINAL_FPS))  # stream time, not wall time
+        if run:
+            with metrics.time("preprocess"):
+                job = tiler.prepare(frame) if tiler is not None else preprocessor(frame)
+            with metrics.time("infer"):
+                last_det = tiler.detect(job) if tiler is not None else letterbox.to_source(detector(job))
+            processed += 1
+        with metrics.time("postprocess"):
+            hits = select(as_records(last_det), conf)
+            if run and len(hits):
+                with_det += 1
+                per_class += class_counts(hits, len(per_class))
+        metrics.observe("end_to_end", time.monotonic() - arrival)
+    wall = time.monotonic() - start
+
+    summary = metrics.summary()
+    report = {
+        "source": source,
+        "mode": f"realtime@{fps}" if fps else "max-speed",
+        "size": size,
+        "conf": conf,
+        "frames": frames,
+        "processed": processed,
+        "dropped": dropped,
+        "wall_s": round(wall, 3),
+        "fps": frames / max(1e-6, wall) if not fps else processed / max(1e-6, wall),
+        "detections": int(per_class.sum()),
+        "frames_with_detections": with_det,
+        "per_class": {names.get(i, str(i)): int(n) for i, n in enumerate(per_class.tolist())},
+        "slowest": summary["slowest"],
+        "stages": {k: {m: round(v, 3) for m, v in s.items() if m != "rate"} for k, s in summary["stages"].items()},
+    }
+    if gate is not None:
+        report["motion_gate"] = gate.stats()
+    if tiler is not None:
+        report["tiling"] = tiler.stats()
+    return report
+
+
+def main():
+    p = argparse.ArgumentParser("Offline replay benchmark for the detection loops")
+    p.add_argument("--model", choices=("v8", "v5", "onnx"), default="v8",
+                   help="v8 = ultralytics YOLO, v5 = DetectMultiBackend, onnx = YOLOv5 .onnx on ONNX Runtime")
+    p.add_argument("--weights", required=True, help="best.pt / best.onnx")
+    p.add_argument("--source", default=os.path.join(ROOT, "..", "Dataset", "val", "images"),
+                   help="Video file or image directory")
+    p.add_argument("--limit", type=int, default=None, help="Max frames to replay")
+    p.add_argument("--size", type=int, default=640, help="Inference resolution (square)")
+    p.add_argument("--conf", type=float, default=0.5, help="Confidence threshold for counted detections")
+    p.add_argument("--fps", type=float, default=None, help="Simulate a live camera at this rate (default: max speed)")
+    p.add_argument("--motion", action="store_true", help="Enable motion gating as in the Enhanced loops")
+    p.add_argument("--tiled", action="store_true", help="Use tiled inference")
+    p.add_argument("-o", "--output", default=None, help="Write the JSON report here as well as stdout")
+    args = p.parse_args()
+
+    metrics = Metrics(window=100000)
+    detector = load_detector(args.model, args.weights, metrics=metrics)
+    gate = tiler = None
+    if args.motion:
+        from motion import MotionGate
+        gate = MotionGate()
+    if args.tiled:
+        from tiling import TiledDetector
+        tiler = TiledDetector(detector, tile=args.size)
+
+    report = replay(detector, args.source, size=args.size, conf=args.conf, fps=args.fps, limit=args.limit,
+                    metrics=metrics, gate=gate, tiler=tiler)
+    report["model"] = args.model
+    report["weights"] = args.weights
+    data = json.dumps(report, indent=2)
+    print(data)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import threading
+import time
+
+
+class FrameScheduler:
+    """Latency-driven frame skipping: process every ``skip + 1``-th frame, with ``skip`` adapted online.
+
+    The source calls :meth:`offer` with the decode timestamp of every frame and
+    only forwards frames it returns ``True`` for; the consumer calls
+    :meth:`done` with the same timestamp once the frame has been acted on. The
+    scheduler keeps smoothed estimates of the source frame interval and of the
+    decode -> done latency, and every ``adapt_every`` results nudges ``skip``:
+
+    * latency above ``target_latency``       -> skip one more frame
+    * latency below ``relax`` x the target   -> skip one frame less
+
+    so the loop tracks real time when inference slows down (thermal
+    throttling, more boxes, a second model) and goes back to processing every
+    frame when it can. The chosen skip rate is printed every ``log_every``
+    seconds.
+
+    Behind a latest-frame reader the latency is mostly processing time, which
+    skipping cannot shorten. ``skip`` is therefore capped at
+    ``service / interval - 1``, where ``service`` is the smoothed time from
+    when a frame could start (its decode, or the previous :meth:`done`) to
+    its :meth:`done`: frames are never offered further apart than one
+    processing time, so skipping never pushes throughput below what inference
+    sustains (a 0.35 s YOLO pass on a 10 FPS stream stops at ``skip = 2``,
+    not ``max_skip``).
+    """
+
+    def __init__(self, target_latency=0.25, max_skip=10, smoothing=0.2, adapt_every=5,
+                 relax=0.6, log_every=10.0, name="SCHED"):
+        self.target_latency = target_latency
+        self.max_skip = max_skip
+        self.smoothing = smoothing
+        self.adapt_every = adapt_every
+        self.relax = relax
+        self.log_every = log_every
+        self.name = name
+
+        self.skip = 0
+        self.interval = None  # smoothed source frame interval, seconds
+        self.latency = None  # smoothed decode -> done latency, seconds
+        self.service = None  # smoothed processing time per frame, seconds
+        self._last_done = None
+        self._since_processed = 0
+        self._last_ts = None
+        self._results = 0
+        self._lock = threading.Lock()
+        self._last_log = time.monotonic()
+        self._window = [0, 0]  # offered, processed since the last log line
+
+        # Counters
+        self.offered = 0
+        self.processed = 0
+
+    def _smooth(self, old, new):
+        return new if old is None else old + self.smoothing * (new - old)
+
+    # ---------------- source side ----------------
+    def offer(self, ts):
+        """Account for a new frame decoded at ``ts``; return ``True`` if it should be processed."""
+        with self._lock:
+            if self._last_ts is not None and ts > self._last_ts:
+                self.interval = self._smooth(self.interval, ts - self._last_ts)
+            self._last_ts = ts
+            self.offered += 1
+            self._window[0] += 1
+            if self._since_processed < self.skip:
+                self._since_processed += 1
+                return False
+            self._since_processed = 0
+            self.processed += 1
+            self._window[1] += 1
+            return True
+
+    # ---------------- consumer side ----------------
+    def done(self, ts, now=None):
+        """Report that the frame decoded at ``ts`` has been fully handled."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.latency = self._smooth(self.latency, now - ts)
+            start = ts if self._last_done is None else max(ts, self._last_done)  # not waiting in a queue
+            self.service = self._smooth(self.service, max(0.0, now - start))
+            self._last_done = max(now, self._last_done or now)
+            self._results += 1
+            if self._results % self.adapt_every == 0:
+                limit = self.skip_limit()
+                if self.skip > limit or (self.latency < self.relax * self.target_latency and self.skip > 0):
+                    self.skip -= 1
+                elif self.latency > self.target_latency and self.skip < limit:
+                    self.skip += 1
+            if self.log_every and now - self._last_log >= self.log_every:
+                offered, processed = self._window
+                self._window = [0, 0]
+                self._last_log = now
+                fps = 1.0 / self.interval if self.interval else 0.0
+                print(f"[{self.name}] skip {self.skip} ({100.0 * (1 - processed / max(1, offered)):.0f}% of "
+                      f"{offered} frames dropped), latency {1000.0 * self.latency:.0f} ms / target "
+                      f"{1000.0 * self.target_latency:.0f} ms, source {fps:.1f} FPS")
+
+    def skip_limit(self):
+        """Largest useful skip: offered frames no further apart than the processing time."""
+        if not self.interval or self.service is None:
+            return 0
+        return max(0, min(self.max_skip, int(self.service / self.interval + 1e-6) - 1))
+
+    def stats(self):
+        return {
+            "skip": self.skip,
+            "skip_limit": self.skip_limit(),
+            "offered": self.offered,
+            "processed": self.processed,
+            "skip_rate": 1.0 - self.processed / max(1, self.offered),
+            "latency_ms": 1000.0 * (self.latency or 0.0),
+            "service_ms": 1000.0 * (self.service or 0.0),
+            "source_fps": 1.0 / self.interval if self.interval else 0.0,
+        }
@@ -0,0 +1,328 @@
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+# Per-slot header, shared between the capture and inference processes
+SLOT_DTYPE = np.dtype([
+    ("seq", "<u8"),  # 0 while the slot is being written
+    ("ts", "<f8"),  # time.monotonic() at decode (CLOCK_MONOTONIC is system-wide on Linux)
+    ("h", "<u4"), ("w", "<u4"), ("c", "<u4"),
+])
+# Ring-wide counters, written by the capture process
+CTRL_DTYPE = np.dtype([
+    ("latest", "<u8"),  # seq of the newest complete frame
+    ("read", "<u8"),
+    ("read_errors", "<u8"),
+    ("oversize", "<u8"),  # frames larger than a slot (skipped)
+    ("capture_s", "<f8"),  # total read + decode time
+    ("pid", "<i8"),
+    ("gen", "<i8"),  # written by the parent: capture generation to run, 0 = paused, -1 = exit
+    ("opened", "<i8"),  # written by the child: gen once its stream opened, -gen if that failed
+])
+
+
+class SharedFrameRing:
+    """``slots`` preallocated frame buffers in one ``multiprocessing.shared_memory`` block.
+
+    The writer fills slots round-robin and never waits for the reader; the
+    reader takes the newest complete slot and gets a NumPy view on it, so no
+    frame is pickled or copied between the processes. Because a slot is
+    overwritten again ``slots`` frames later, a reader that holds a view for a
+    while checks :meth:`valid` (the slot still holds the frame with that
+    timestamp) before trusting it.
+    """
+
+    def __init__(self, slots=8, max_shape=(1080, 1920, 3), name=None, create=True):
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.slot_bytes = int(np.prod(self.max_shape))
+        size = CTRL_DTYPE.itemsize + slots * SLOT_DTYPE.itemsize + slots * self.slot_bytes
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self.shm.name
+        self.owner = create
+        buf = self.shm.buf
+        off = 0
+        self.ctrl = np.ndarray((), dtype=CTRL_DTYPE, buffer=buf, offset=off)
+        off += CTRL_DTYPE.itemsize
+        self.hdr = np.ndarray((slots,), dtype=SLOT_DTYPE, buffer=buf, offset=off)
+        off += slots * SLOT_DTYPE.itemsize
+        self.data = np.ndarray((slots, self.slot_bytes), dtype=np.uint8, buffer=buf, offset=off)
+        if create:
+            self.ctrl.fill(0)
+            self.hdr.fill(0)
+
+    # ---------------- writer ----------------
+    def write(self, frame, ts, lock):
+        """Copy ``frame`` into the next slot; returns its seq, or 0 if it does not fit."""
+        if frame.nbytes > self.slot_bytes:
+            self.ctrl["oversize"] += 1
+            return 0
+        seq = int(self.ctrl["latest"]) + 1
+        slot = seq % self.slots
+        with lock:
+            self.hdr["seq"][slot] = 0  # readers' valid() fails from here on
+            self.hdr["ts"][slot] = 0.0
+        self.data[slot, :frame.nbytes] = frame.reshape(-1)
+        h, w = frame.shape[:2]
+        with lock:
+            self.hdr[slot] = (seq, ts, h, w, frame.shape[2] if frame.ndim == 3 else 1)
+            self.ctrl["latest"] = seq
+        return seq
+
+    # ---------------- reader ----------------
+    def latest(self):
+        """seq of the newest complete frame (0 once the ring is closed)."""
+        ctrl = self.ctrl  # close() may clear the attributes from another thread
+        return 0 if ctrl is None else int(ctrl["latest"])
+
+    def view(self, seq, lock):
+        """``(frame_view, ts)`` for ``seq``, or ``(None, 0.0)`` if that slot has moved on."""
+        hdr, data = self.hdr, self.data
+        if hdr is None or data is None:
+            return None, 0.0
+        slot = seq % self.slots
+        with lock:
+            s, ts, h, w, c = hdr[slot].tolist()
+        if s != seq:
+            return None, 0.0
+        shape = (h, w, c) if c > 1 else (h, w)
+        return data[slot, :h * w * c].reshape(shape), ts
+
+    def valid(self, ts):
+        """``True`` while some slot still holds the frame decoded at ``ts``."""
+        hdr = self.hdr
+        return hdr is not None and ts > 0.0 and bool((hdr["ts"] == ts).any())
+
+    def close(self):
+        self.ctrl = self.hdr = self.data = None  # views must go before the mapping
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a caller still holds a frame view; the mapping goes away with the process
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class _CaptureTime:
+    """Metrics sink for the capture process: sums the reader's read + decode time into the ring."""
+
+    def __init__(self, ctrl):
+        self.ctrl = ctrl
+
+    def observe(self, name, seconds):
+        self.ctrl["capture_s"] += seconds
+
+
+def _capture_main(ring_name, slots, max_shape, cond, url, fps, width, height):
+    """Capture process: run the capture generation the parent asks for until it exits or dies."""
+    from frame_reader import LatestFrameReader, open_http_capture
+
+    parent = os.getppid()
+    ring = SharedFrameRing(slots, max_shape, name=ring_name, create=False)
+    ctrl = ring.ctrl
+    ctrl["pid"] = os.getpid()
+    # A stalled read blocks only the reader's thread, so a reconnect never waits for it
+    reader = LatestFrameReader(lambda: open_http_capture(url, fps=fps, width=width, height=height),
+                               name="capture", metrics=_CaptureTime(ctrl))
+    gen = 0
+    try:
+        while os.getppid() == parent:
+            want = int(ctrl["gen"])
+            if want < 0:
+                break
+            if want != gen:  # start() / stop() in the parent
+                reader.stop()
+                gen = want
+                if gen:
+                    ctrl["opened"] = gen if reader.start() else -gen
+            if not reader.running:
+                time.sleep(0.05)
+                continue
+            ok, frame, ts = reader.read(timeout=0.1)
+            ctrl["read_errors"] = reader.read_errors
+            if ok and ring.write(frame, ts, cond):
+                ctrl["read"] += 1
+                with cond:
+                    cond.notify_all()
+    except KeyboardInterrupt:
+        pass  # Ctrl+C reaches the whole process group; the parent does the cleanup
+    finally:
+        reader.stop()
+        ring.close()
+
+
+class ShmFrameReader:
+    """Drop-in for :class:`frame_reader.LatestFrameReader` with capture in a separate process.
+
+    Decoding the camera stream then runs on another core under its own GIL,
+    so it no longer competes with preprocessing, NMS and drawing in the
+    detection process. :meth:`read` returns a zero-copy view of the newest
+    frame in the shared ring; check :meth:`valid` with the frame's timestamp
+    before using a view that has been held across pipeline stages.
+
+    The capture process is forked once, by :meth:`launch`, and lives until
+    :meth:`close` or the parent's death; :meth:`start` and :meth:`stop` (the
+    watchdog's reconnects) only open and close the stream inside it. Call
+    :meth:`launch` before loading models or starting threads: forking a
+    multithreaded process can deadlock in OpenMP/OpenCV thread pools, and
+    spawn is not an option because the detection scripts have no
+    ``__main__`` guard to stop the child from re-running them. If the capture
+    process dies, :meth:`start` fails rather than fork again from a
+    multithreaded process.
+    """
+
+    def __init__(self, url, fps=10, width=640, height=480, slots=8, max_shape=(1080, 1920, 3),
+                 name="capture-proc", max_age=2.0):
+        self.url = url
+        self.fps, self.width, self.height = fps, width, height
+        self.slots = slots
+        self.max_shape = max_shape
+        self.name = name
+        self.max_age = max_age  # frames older than this are never handed out
+        self._ctx = mp.get_context("fork")
+        self._cond = self._ctx.Condition()
+        self._proc = None
+        self.ring = None
+        self._gen = 0
+        self._active = False  # between start() and stop()
+        self._start_seq = 0  # ring seq when the current generation was started
+        self._consumed = 0
+
+        # Counters
+        self.frames_consumed = 0
+        self.stale = 0  # newest frame was older than max_age when read
+        self._last = (0, 0.0)  # (seq, ts) of the newest frame handed out
+
+    # ---------------- lifecycle ----------------
+    def launch(self):
+        """Fork the (idle) capture process and create the ring; returns ``self``."""
+        if self._proc is None:
+            self.ring = SharedFrameRing(self.slots, self.max_shape)
+            self._proc = self._ctx.Process(
+                target=_capture_main, name=self.name, daemon=True,
+                args=(self.ring.name, self.slots, self.max_shape, self._cond,
+                      self.url, self.fps, self.width, self.height))
+            self._proc.start()
+        return self
+
+    def start(self, timeout=10.0):
+        """Open the stream in the capture process; ``True`` once it has delivered a first frame."""
+        if self._proc is None:
+            print("[CAPTURE] ShmFrameReader.launch() was not called early; forking now")
+            self.launch()
+        ring = self.ring
+        if ring is None or not self._proc.is_alive():
+            return False
+        with self._cond:
+            self._gen += 1
+            gen = self._gen
+            self._start_seq = self._consumed = ring.latest()
+            ring.ctrl["gen"] = gen
+        self._active = True
+        deadline = time.monotonic() + timeout
+        while ring.latest() <= self._start_seq:
+            if (not self._proc.is_alive() or ring.ctrl["opened"] == -gen
+                    or time.monotonic() > deadline):
+                self.stop()
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout=2.0):
+        """Close the stream; the capture process and the ring stay for the next :meth:`start`."""
+        self._active = False
+        ring = self.ring
+        if ring is not None and ring.ctrl is not None:
+            with self._cond:
+                ring.ctrl["gen"] = 0
+                self._cond.notify_all()
+
+    def close(self, timeout=2.0):
+        """Stop the capture process and unlink the shared memory."""
+        self.stop()
+        if self._proc is not None:
+            self.ring.ctrl["gen"] = -1
+            self._proc.join(timeout)
+            if self._proc.is_alive():
+                self._proc.terminate()
+                self._proc.join(timeout)
+            self._proc = None
+        ring, self.ring = self.ring, None
+        if ring is not None:
+            ring.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- consumer API ----------------
+    def read(self, timeout=None):
+        """Return ``(ok, frame_view, frame_ts)`` for the newest frame not yet consumed."""
+        ring = self.ring
+        if ring is None or not self._active:
+            return False, None, 0.0
+        with self._cond:
+            if ring.latest() <= self._consumed and timeout != 0:
+                self._cond.wait_for(lambda: ring.latest() > self._consumed or not self.running,
+                                    timeout=timeout)
+        seq = ring.latest()
+        if seq <= self._consumed or not self._active:
+            return False, None, 0.0
+        self._consumed = seq
+        frame, ts = ring.view(seq, self._cond)
+        if frame is None:
+            return False, None, 0.0
+        if time.monotonic() - ts > self.max_age:
+            self.stale += 1
+            return False, None, 0.0
+        self.frames_consumed += 1
+        self._last = (seq, ts)
+        return True, frame, ts
+
+    def valid(self, ts):
+        """``True`` if the view returned with ``ts`` has not been overwritten (``False`` once stopped)."""
+        ring = self.ring
+        return self._active and ring is not None and ring.valid(ts)
+
+    def latest(self):
+        ring = self.ring
+        if ring is None or not self._active:
+            return None, 0.0
+        return ring.view(ring.latest(), self._cond)
+
+    def frame_age(self):
+        ring = self.ring
+        if ring is None or not self._active or ring.latest() <= self._start_seq:
+            return float("inf")  # nothing from the current generation yet
+        _, ts = ring.view(ring.latest(), self._cond)
+        return time.monotonic() - ts if ts else float("inf")
+
+    @property
+    def running(self):
+        return self._active and self._proc is not None and self._proc.is_alive()
+
+    def stats(self):
+        ring = self.ring
+        ctrl = ring.ctrl if ring is not None else None
+        if ctrl is None:
+            return {"running": False, "consumed": self.frames_consumed, "stale": self.stale}
+        read = int(ctrl["read"])
+        return {
+            "running": self.running,
+            "read": read,
+            "consumed": self.frames_consumed,
+            "dropped": read - self.frames_consumed,
+            "stale": self.stale,
+            "read_errors": int(ctrl["read_errors"]),
+            "oversize": int(ctrl["oversize"]),
+            "capture_ms": 1000.0 * float(ctrl["capture_s"]) / max(1, read),
+            "frame_age": self.frame_age(),
+        }
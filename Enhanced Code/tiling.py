@@ -0,0 +1,115 @@
+import cv2
+import numpy as np
+from letterbox import Letterbox
+from preprocessing import FramePreprocessor
+
+
+def make_tiles(width, height, tile=640, overlap=0.2):
+    """Overlapping ``tile`` x ``tile`` windows covering the frame, as an (N, 4) int array [x1, y1, x2, y2].
+
+    Windows in each row/column are spread evenly between the two frame
+    borders, so every window has the full tile size (unless the frame itself
+    is smaller than a tile) and neighbours overlap by at least ``overlap``.
+    """
+    def starts(length):
+        if length <= tile:
+            return [0]
+        step = max(1, int(tile * (1.0 - overlap)))
+        n = -(-(length - tile) // step) + 1  # ceil
+        return np.linspace(0, length - tile, n).round().astype(int).tolist()
+
+    tw, th = min(tile, width), min(tile, height)
+    return np.array([(x, y, x + tw, y + th) for y in starts(height) for x in starts(width)], dtype=np.int32)
+
+
+def merge_nms(det, iou=0.5, max_wh=7680):
+    """Class-aware NMS over (N, 6) ``[x1, y1, x2, y2, conf, cls]`` boxes merged from several tiles."""
+    if len(det) < 2:
+        return det
+    xywh = det[:, :4].copy()
+    xywh[:, 2:] -= xywh[:, :2]
+    xywh[:, :2] += det[:, 5:6] * max_wh  # boxes of different classes never overlap
+    idx = cv2.dnn.NMSBoxes(xywh.tolist(), det[:, 4].tolist(), 0.0, iou)
+    return det[np.asarray(idx, dtype=np.int64).reshape(-1)]
+
+
+class TiledDetector:
+    """Sliced inference: overlapping full-resolution tiles run as one detector batch.
+
+    Distant nilgai or buffalo that shrink to a few pixels when the whole main
+    stream is squeezed into 640x640 keep their native resolution inside a
+    tile. Every tile (plus, with ``full_frame=True``, a letterboxed copy of the
+    whole frame to catch animals larger than a tile) goes through the usual
+    enhancement and is sent to ``detector.batch`` in one call; the boxes are
+    shifted back to frame pixels and merged with class-aware NMS.
+
+    ``regions`` (e.g. :meth:`motion.MotionGate.regions`) limits the tiles to
+    those overlapping recent motion, so a quiet field costs one full-frame
+    pass instead of the whole grid.
+
+    :meth:`prepare` and :meth:`detect` split the work so it fits the
+    preprocess / infer pipeline stages; calling the object does both.
+    """
+
+    def __init__(self, detector, tile=640, overlap=0.2, iou=0.5, full_frame=True, **preprocess):
+        self.detector = detector
+        self.tile = tile
+        self.overlap = overlap
+        self.iou = iou
+        self._tile_lb = Letterbox((tile, tile))
+        self._tile_pre = FramePreprocessor(letterbox=self._tile_lb, **preprocess)
+        self._frame_lb = Letterbox((tile, tile)) if full_frame else None
+        self._frame_pre = FramePreprocessor(letterbox=self._frame_lb, **preprocess) if full_frame else None
+        self._shape = None
+        self.tiles = None  # (N, 4) windows for the current stream geometry
+
+        # Counters
+        self.frames = 0
+        self.tiles_run = 0
+
+    def _windows(self, frame, regions):
+        h, w = frame.shape[:2]
+        if self._shape != (h, w):
+            self.tiles = make_tiles(w, h, self.tile, self.overlap)
+            self._shape = (h, w)
+        if regions is None:
+            return self.tiles
+        if not len(regions):
+            return self.tiles[:0]
+        r = np.asarray(regions, dtype=np.int32)
+        t = self.tiles
+        hit = ((t[:, None, 0] < r[None, :, 2]) & (t[:, None, 2] > r[None, :, 0]) &
+               (t[:, None, 1] < r[None, :, 3]) & (t[:, None, 3] > r[None, :, 1])).any(1)
+        return t[hit]
+
+    def prepare(self, frame, regions=None):
+        """Crop and enhance the tiles for ``frame``; returns an opaque job for :meth:`detect`."""
+        windows = self._windows(frame, regions)
+        imgs = [self._tile_pre(frame[y1:y2, x1:x2]).copy() for x1, y1, x2, y2 in windows.tolist()]
+        if self._frame_pre is not None:
+            imgs.append(self._frame_pre(frame).copy())
+        return imgs, windows
+
+    def detect(self, job):
+        """Run a prepared job; returns (N, 6) boxes in frame pixels."""
+        imgs, windows = job
+        self.frames += 1
+        self.tiles_run += len(windows)
+        if not imgs:
+            return np.zeros((0, 6), dtype=np.float32)
+        dets = self.detector.batch(imgs)
+        parts = []
+        for det, (x1, y1, _, _) in zip(dets, windows.tolist()):
+            det = self._tile_lb.to_source(det)  # tiles share one geometry
+            det[:, :4] += (x1, y1, x1, y1)
+            parts.append(det)
+        if self._frame_lb is not None:
+            parts.append(self._frame_lb.to_source(dets[-1]))
+        return merge_nms(np.concatenate(parts), self.iou)
+
+    def __call__(self, frame, regions=None):
+        return self.detect(self.prepare(frame, regions))
+
+    def stats(self):
+        return {"frames": self.frames, "grid": 0 if self.tiles is None else len(self.tiles),
+                "tiles_per_frame": self.tiles_run / max(1, self.frames)}
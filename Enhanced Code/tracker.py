@@ -0,0 +1,223 @@
+import cv2
+import numpy as np
+from postprocess import as_records, labels
+
+# Kalman state per track: [cx, cy, w, h, vx, vy, vw, vh], velocities in pixels/second
+_NDIM = 8
+_H_SLICE = slice(0, 4)
+
+
+def box_iou(a, b):
+    """Pairwise IoU of (N, 4) and (M, 4) ``[x1, y1, x2, y2]`` arrays -> (N, M)."""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def _greedy_match(score, threshold):
+    """Highest-score-first one-to-one matching; returns (rows, cols) with score >= threshold."""
+    rows, cols = [], []
+    if score.size == 0:
+        return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+    used_r = np.zeros(score.shape[0], dtype=bool)
+    used_c = np.zeros(score.shape[1], dtype=bool)
+    order = np.argsort(-score, axis=None)
+    for flat in order[score.reshape(-1)[order] >= threshold].tolist():
+        r, c = divmod(flat, score.shape[1])
+        if not used_r[r] and not used_c[c]:
+            used_r[r] = used_c[c] = True
+            rows.append(r)
+            cols.append(c)
+    return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+
+def _xyxy_to_cxcywh(b):
+    return np.stack([(b[:, 0] + b[:, 2]) / 2, (b[:, 1] + b[:, 3]) / 2, b[:, 2] - b[:, 0], b[:, 3] - b[:, 1]], 1)
+
+
+def _cxcywh_to_xyxy(m):
+    half = m[:, 2:4] / 2
+    return np.concatenate([m[:, :2] - half, m[:, :2] + half], 1)
+
+
+class Tracker:
+    """ByteTrack-style IoU + Kalman tracker, vectorised over all tracks with NumPy.
+
+    Every track carries a constant-velocity Kalman filter on box centre and
+    size. Per frame with fresh detections (:meth:`update`):
+
+    1. all tracks are predicted to the frame time (time-based, so frames
+       skipped by the scheduler or the motion gate are simply a longer step)
+    2. detections with ``conf >= high`` are matched to tracks by class-aware IoU
+    3. remaining tracks get a second chance against the low-confidence
+       detections (``low <= conf < high``), which keeps an animal half hidden
+       in crops from dropping its identity
+    4. unmatched high-confidence detections start tentative tracks
+
+    A track is *confirmed* after ``min_hits`` matches; tentative tracks die on
+    their first miss, confirmed ones coast on prediction for up to
+    ``max_age`` seconds. On frames without inference call :meth:`predict`.
+    :meth:`alert` is what the deterrent should follow: one flickering
+    detection does not fire it, and a confirmed animal keeps it on across
+    frames that were not run through YOLO.
+    """
+
+    def __init__(self, high=0.5, low=0.1, match_iou=0.3, min_hits=3, max_age=6.0,
+                 pos_std=1.0 / 20, vel_std=0.1, meas_std=1.0 / 20):
+        self.high = high
+        self.low = low
+        self.match_iou = match_iou
+        self.min_hits = min_hits
+        self.max_age = max_age
+        self.pos_std = pos_std  # noise std relative to box height (process noise per second)
+        self.vel_std = vel_std
+        self.meas_std = meas_std
+
+        self.mean = np.zeros((0, _NDIM))
+        self.cov = np.zeros((0, _NDIM, _NDIM))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.cls = np.zeros(0)
+        self.conf = np.zeros(0)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.last_seen = np.zeros(0)  # time of the last matched detection
+        self.t = None  # time the state was last predicted to
+        self._next_id = 1
+
+        # Counters
+        self.created = 0
+        self.confirmed_total = 0
+
+    # ---------------- Kalman ----------------
+    def _predict(self, ts):
+        if self.t is None:
+            self.t = ts
+        dt = max(0.0, ts - self.t)
+        self.t = max(self.t, ts)
+        if not len(self.mean) or dt == 0.0:
+            return
+        self.mean[:, :4] += self.mean[:, 4:] * dt
+        F = np.eye(_NDIM)
+        F[:4, 4:] = np.eye(4) * dt
+        h = self.mean[:, 3:4]
+        q = np.concatenate([np.repeat((self.pos_std * h) ** 2, 4, 1),
+                            np.repeat((self.vel_std * h) ** 2, 4, 1)], 1) * dt
+        self.cov = F @ self.cov @ F.T
+        self.cov[:, np.arange(_NDIM), np.arange(_NDIM)] += q
+
+    def _correct(self, idx, z):
+        mean, cov = self.mean[idx], self.cov[idx]
+        r = (self.meas_std * mean[:, 3:4]) ** 2
+        S = cov[:, _H_SLICE, _H_SLICE] + r[:, :, None] * np.eye(4)
+        K = cov[:, :, _H_SLICE] @ np.linalg.inv(S)  # (M, 8, 4)
+        mean += (K @ (z - mean[:, _H_SLICE])[:, :, None])[:, :, 0]
+        cov -= K @ cov[:, _H_SLICE, :]
+        self.mean[idx], self.cov[idx] = mean, cov
+
+    def _new_tracks(self, det, ts):
+        n = len(det)
+        z = _xyxy_to_cxcywh(det[:, :4])
+        mean = np.concatenate([z, np.zeros((n, 4))], 1)
+        h = z[:, 3]
+        std = np.stack([2 * self.pos_std * h] * 4 + [10 * self.vel_std * h] * 4, 1)
+        cov = np.zeros((n, _NDIM, _NDIM))
+        cov[:, np.arange(_NDIM), np.arange(_NDIM)] = std ** 2
+        self.mean = np.concatenate([self.mean, mean])
+        self.cov = np.concatenate([self.cov, cov])
+        self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + n)])
+        self._next_id += n
+        self.cls = np.concatenate([self.cls, det[:, 5]])
+        self.conf = np.concatenate([self.conf, det[:, 4]])
+        self.hits = np.concatenate([self.hits, np.ones(n, dtype=np.int64)])
+        self.last_seen = np.concatenate([self.last_seen, np.full(n, ts)])
+        self.created += n
+
+    def _keep(self, mask):
+        for name in ("mean", "cov", "ids", "cls", "conf", "hits", "last_seen"):
+            setattr(self, name, getattr(self, name)[mask])
+
+    def _associate(self, tracks, det):
+        """Match track indices ``tracks`` to rows of ``det``; returns (track_idx, det_idx)."""
+        if not len(tracks) or not len(det):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        iou = box_iou(_cxcywh_to_xyxy(self.mean[tracks, :4]), det[:, :4])
+        iou *= self.cls[tracks][:, None] == det[None, :, 5]  # never switch species
+        r, c = _greedy_match(iou, self.match_iou)
+        return tracks[r], c
+
+    # ---------------- public API ----------------
+    def update(self, det, ts):
+        """Advance to ``ts`` with fresh detections ((N, 6) ``[x1, y1, x2, y2, conf, cls]``)."""
+        det = np.asarray(det, dtype=np.float64).reshape(-1, 6)
+        self._predict(ts)
+        high = det[det[:, 4] >= self.high]
+        low = det[(det[:, 4] >= self.low) & (det[:, 4] < self.high)]
+
+        all_tracks = np.arange(len(self.ids))
+        t1, d1 = self._associate(all_tracks, high)
+        left = np.setdiff1d(all_tracks, t1)
+        t2, d2 = self._associate(left[self.hits[left] >= self.min_hits], low)  # second pass: confirmed only
+
+        matched_t = np.concatenate([t1, t2])
+        if len(matched_t):
+            z = np.concatenate([high[d1], low[d2]])
+            was_confirmed = self.hits[matched_t] >= self.min_hits
+            self._correct(matched_t, _xyxy_to_cxcywh(z[:, :4]))
+            self.conf[matched_t] = z[:, 4]
+            self.hits[matched_t] += 1
+            self.last_seen[matched_t] = ts
+            self.confirmed_total += int(((self.hits[matched_t] >= self.min_hits) & ~was_confirmed).sum())
+
+        # Tentative tracks die on their first miss, confirmed ones after max_age
+        matched = np.zeros(len(self.ids), dtype=bool)
+        matched[matched_t] = True
+        confirmed = self.hits >= self.min_hits
+        self._keep(matched | (confirmed & (ts - self.last_seen <= self.max_age)))
+
+        unmatched = np.ones(len(high), dtype=bool)
+        unmatched[d1] = False
+        if unmatched.any():
+            self._new_tracks(high[unmatched], ts)
+        return self.tracks()
+
+    def predict(self, ts):
+        """Advance to ``ts`` without detections (frame skipped or not run through YOLO)."""
+        self._predict(ts)
+        self._keep(ts - self.last_seen <= self.max_age)  # tentative tracks wait for the next detection
+        return self.tracks()
+
+    def tracks(self, confirmed_only=True):
+        """(K, 7) float32 ``[x1, y1, x2, y2, conf, cls, track_id]`` of live tracks (predicted boxes)."""
+        mask = self.hits >= self.min_hits if confirmed_only else np.ones(len(self.ids), dtype=bool)
+        out = np.empty((int(mask.sum()), 7), dtype=np.float32)
+        out[:, :4] = _cxcywh_to_xyxy(self.mean[mask, :4])
+        out[:, 4] = self.conf[mask]
+        out[:, 5] = self.cls[mask]
+        out[:, 6] = self.ids[mask]
+        return out
+
+    def alert(self):
+        """``True`` while at least one confirmed track is alive."""
+        return bool((self.hits >= self.min_hits).any())
+
+    def stats(self):
+        return {"tracks": len(self.ids), "confirmed": int((self.hits >= self.min_hits).sum()),
+                "created": self.created, "confirmed_total": self.confirmed_total}
+
+
+def track_labels(tracks, names):
+    """``"<name> <conf> #<id>"`` strings for the rows returned by :meth:`Tracker.tracks`."""
+    if not len(tracks):
+        return []
+    text = np.array(labels(as_records(tracks[:, :6]), names))
+    return np.char.add(np.char.add(text, " #"), tracks[:, 6].astype(np.int64).astype(str)).tolist()
+
+
+def draw_tracks(frame, tracks, names, color=(0, 255, 0)):
+    """Draw tracked boxes with their id in place (the tracking counterpart of ``postprocess.draw_detections``)."""
+    for (x1, y1, x2, y2), label in zip(tracks[:, :4].astype(np.int32).tolist(), track_labels(tracks, names)):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame